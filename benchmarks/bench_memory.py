@@ -0,0 +1,107 @@
+"""Track memory benchmark.
+
+Builds a synthetic library the way SpotifyClient sees it (JSON pages parsed
+into fresh strings) and compares the memory held by per-track dicts with
+the slotted, interned Track, plus full Spotify playlist objects against the
+trimmed ones kept for the playlist picker.
+
+    python benchmarks/bench_memory.py --tracks 100000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from fake_services import fake_track
+from track import Track, compact_playlist
+
+PAGE_SIZE = 100
+
+def track_pages(count):
+    """Yield parsed API pages, so every string is a separate object as with a real response"""
+    for start in range(0, count, PAGE_SIZE):
+        items = [{'track': fake_track(number)} for number in range(start, min(count, start + PAGE_SIZE))]
+        yield [item['track'] for item in json.loads(json.dumps({'items': items}))['items']]
+
+def as_dict(track):
+    return {
+        'id': track['id'],
+        'title': track['name'],
+        'artist': track['artists'][0]['name'],
+        'album': track['album']['name']
+    }
+
+def as_track(track):
+    return Track(track['id'], track['name'], track['artists'][0]['name'], track['album']['name'])
+
+def fake_playlist(number):
+    """A playlist object shaped like the Spotify API's, images and links included"""
+    return {
+        'collaborative': False,
+        'description': f"Playlist number {number} with a description of typical length",
+        'external_urls': {'spotify': f"https://open.spotify.com/playlist/fakeplaylist{number:06d}"},
+        'href': f"https://api.spotify.com/v1/playlists/fakeplaylist{number:06d}",
+        'id': f"fakeplaylist{number:06d}",
+        'images': [
+            {'height': size, 'url': f"https://mosaic.scdn.co/{size}/ab67616d0000b273{number:024d}", 'width': size}
+            for size in (640, 300, 60)
+        ],
+        'name': f"Playlist {number}",
+        'owner': {
+            'display_name': "benchmark",
+            'external_urls': {'spotify': "https://open.spotify.com/user/benchmark"},
+            'href': "https://api.spotify.com/v1/users/benchmark",
+            'id': "benchmark",
+            'type': "user",
+            'uri': "spotify:user:benchmark"
+        },
+        'primary_color': None,
+        'public': False,
+        'snapshot_id': f"MTYsM2Q{number:032d}",
+        'tracks': {'href': f"https://api.spotify.com/v1/playlists/fakeplaylist{number:06d}/tracks", 'total': 50},
+        'type': "playlist",
+        'uri': f"spotify:playlist:fakeplaylist{number:06d}"
+    }
+
+def measure(build):
+    """Return (bytes still allocated by build's result, result length)"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, len(result)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=100000, help="tracks in the synthetic library")
+    parser.add_argument("--playlists", type=int, default=5000, help="playlists in the synthetic library")
+    args = parser.parse_args(argv)
+    
+    rows = [
+        ("tracks as dicts", lambda: [as_dict(t) for page in track_pages(args.tracks) for t in page]),
+        ("tracks as Track", lambda: [as_track(t) for page in track_pages(args.tracks) for t in page]),
+        ("playlists, full API objects",
+         lambda: [json.loads(json.dumps(fake_playlist(n))) for n in range(args.playlists)]),
+        ("playlists, trimmed",
+         lambda: [compact_playlist(json.loads(json.dumps(fake_playlist(n)))) for n in range(args.playlists)]),
+    ]
+    results = {}
+    print(f"{'representation':<30} {'items':>8} {'MB':>8} {'bytes/item':>11}")
+    for label, build in rows:
+        size, count = measure(build)
+        results[label] = size
+        print(f"{label:<30} {count:>8} {size / (1024 * 1024):>8.2f} {size / max(1, count):>11.0f}")
+    
+    print(f"\nTrack saves {1 - results['tracks as Track'] / results['tracks as dicts']:.0%} over dicts; "
+          f"trimmed playlists save {1 - results['playlists, trimmed'] / results['playlists, full API objects']:.0%}")
+
+if __name__ == "__main__":
+    main()
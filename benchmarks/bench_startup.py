@@ -0,0 +1,103 @@
+"""Startup-time benchmark.
+
+Launches a fresh interpreter several times and measures interpreter start,
+the import of the GUI module and the first paint of the main window, and
+lists any heavy client libraries that were imported before the user
+connected. First paint needs a display; without one only imports are
+measured. Save results with --output and pass them back with --compare on
+a later run to see the change.
+
+    python benchmarks/bench_startup.py --repeat 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.abspath(os.path.join(BENCH_DIR, "..", "src"))
+
+# Libraries that should only load once the user connects
+HEAVY_MODULES = ("spotipy", "ytmusicapi", "requests", "urllib3", "google.auth", "dotenv")
+
+CHILD = """
+import json, sys, time
+started = time.time()
+sys.path.insert(0, {src!r})
+import gui
+imported = time.time()
+result = {{'started': started, 'import': imported - started,
+           'heavy': [name for name in {heavy!r} if name in sys.modules]}}
+try:
+    app = gui.SpotifyToYouTubeApp()
+except Exception as e:
+    result['first_paint'] = None
+    result['error'] = str(e).splitlines()[0]
+else:
+    app.root.update()
+    result['first_paint'] = time.time() - started
+    app.root.destroy()
+print(json.dumps(result))
+"""
+
+def run_once(python):
+    code = CHILD.format(src=SRC_DIR, heavy=HEAVY_MODULES)
+    # Keep the app's data and logs out of the real app data directory
+    env = dict(os.environ, APPDATA=tempfile.gettempdir(), XDG_DATA_HOME=tempfile.gettempdir())
+    launched = time.time()
+    output = subprocess.run([python, "-c", code], capture_output=True, text=True, env=env, check=True)
+    finished = time.time()
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    result['interpreter'] = result.pop('started') - launched
+    result['total'] = finished - launched
+    return result
+
+def median(results, key):
+    values = [r[key] for r in results if r.get(key) is not None]
+    return round(statistics.median(values) * 1000, 1) if values else None
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="launches to take the median of")
+    parser.add_argument("--python", default=sys.executable, help="interpreter to launch")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON results from an earlier run to compare against")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    runs = [run_once(args.python) for _ in range(args.repeat)]
+    
+    summary = {
+        'interpreter_ms': median(runs, 'interpreter'),
+        'import_ms': median(runs, 'import'),
+        'first_paint_ms': median(runs, 'first_paint'),
+        'total_ms': median(runs, 'total'),
+        'heavy_modules': sorted({name for r in runs for name in r['heavy']})
+    }
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)['summary']
+    
+    for key in ('interpreter_ms', 'import_ms', 'first_paint_ms', 'total_ms'):
+        value = summary[key]
+        line = f"{key:>15} {value if value is not None else 'n/a':>9}"
+        before = previous.get(key) if previous else None
+        if value is not None and before:
+            line += f"   {(value / before - 1) * 100:+.1f}% vs baseline"
+        print(line)
+    if summary['first_paint_ms'] is None and runs[0].get('error'):
+        print(f"  first paint skipped: {runs[0]['error']}")
+    print(f"  heavy modules at startup: {', '.join(summary['heavy_modules']) or 'none'}")
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({'config': vars(args), 'summary': summary, 'runs': runs}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Offline transfer throughput benchmark.
+
+Runs run_transfer against the simulated backends in fake_services and
+reports tracks/sec, p50/p95 per-track latency and peak Python memory for
+each library size. Save results with --output and pass them back with
+--compare on a later run to see the change.
+
+    python benchmarks/bench_transfer.py --sizes 100,1000,10000
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+# Keep caches and journals out of the real app data directory
+_data_dir = tempfile.mkdtemp(prefix="spotify-to-ytmusic-bench-")
+os.environ["APPDATA"] = _data_dir
+os.environ["XDG_DATA_HOME"] = _data_dir
+
+from fake_services import FakeSpotify, FakeYTMusic, make_library
+from match_cache import MatchCache
+from metrics import MetricsRegistry
+from spotify_client import SpotifyClient
+from transfer import run_transfer
+from youtube_client import YouTubeClient
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+def run_once(size, args):
+    library = make_library(size, max(1, min(args.playlists, size)), overlap=args.overlap, seed=args.seed)
+    backend = dict(latency=args.latency, jitter=args.jitter, seed=args.seed)
+    
+    # Errors and throttling are only injected on the YouTube side; spotipy
+    # retries 429/5xx responses internally
+    metrics = MetricsRegistry()
+    spotify_client = SpotifyClient("bench", "bench", metrics=metrics)
+    spotify_client.sp = FakeSpotify(library, **backend)
+    youtube_client = YouTubeClient("bench", "bench", cache=MatchCache(":memory:"),
+                                   max_workers=args.workers, requests_per_second=args.rate,
+                                   metrics=metrics)
+    youtube_client.ytmusic = FakeYTMusic(miss_rate=args.miss_rate, error_rate=args.error_rate,
+                                         max_rps=args.max_rps, **backend)
+    
+    latencies = []
+    search_track = youtube_client.search_track
+    
+    def timed_search(track_info, *a, **kw):
+        started = time.perf_counter()
+        try:
+            return search_track(track_info, *a, **kw)
+        finally:
+            latencies.append(time.perf_counter() - started)
+    
+    youtube_client.search_track = timed_search
+    
+    if args.trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    # Silence the clients' own diagnostic prints (injected errors would flood the table)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        playlists = spotify_client.get_playlists()
+        summary = run_transfer(spotify_client, youtube_client, playlists, on_status=lambda message: None,
+                               max_parallel=args.parallel, order=args.order, dedupe=args.dedupe)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] if args.trace_memory else 0
+    if args.trace_memory:
+        tracemalloc.stop()
+    
+    transferred = sum(p['transferred'] for p in summary['playlists'])
+    return {
+        'size': size,
+        'seconds': round(elapsed, 3),
+        'tracks_per_sec': round(size / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'peak_mb': round(peak / (1024 * 1024), 2),
+        'transferred': transferred,
+        'searches': len(latencies),
+        'retries': youtube_client.retry.retries,
+        'spotify': spotify_client.sp.stats(),
+        'youtube': youtube_client.ytmusic.stats(),
+        'metrics': summary['metrics']
+    }
+
+def print_table(results, previous=None):
+    previous = {r['size']: r for r in (previous or [])}
+    print(f"{'tracks':>8} {'secs':>9} {'tracks/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'peak MB':>8} {'added':>8} {'429s':>6}")
+    for r in results:
+        line = (f"{r['size']:>8} {r['seconds']:>9.2f} {r['tracks_per_sec']:>10.1f} "
+                f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['peak_mb']:>8.2f} {r['transferred']:>8} {r['youtube']['throttled']:>6}")
+        before = previous.get(r['size'])
+        if before and before['tracks_per_sec']:
+            change = (r['tracks_per_sec'] / before['tracks_per_sec'] - 1) * 100
+            line += f"   {change:+.1f}% tracks/s vs baseline"
+        print(line)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000,100000",
+                        help="comma-separated library sizes in tracks")
+    parser.add_argument("--playlists", type=int, default=10, help="playlists per library")
+    parser.add_argument("--overlap", type=float, default=0.3, help="fraction of repeated tracks")
+    parser.add_argument("--latency", type=float, default=0.02, help="mean seconds per API call")
+    parser.add_argument("--jitter", type=float, default=0.01, help="+/- seconds added to latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls failing with 503")
+    parser.add_argument("--max-rps", type=float, default=None, help="server-side limit before HTTP 429")
+    parser.add_argument("--miss-rate", type=float, default=0.05, help="fraction of searches with no result")
+    parser.add_argument("--workers", type=int, default=4, help="YouTubeClient max_workers")
+    parser.add_argument("--rate", type=float, default=1000.0, help="YouTubeClient requests_per_second")
+    parser.add_argument("--parallel", type=int, default=1, help="playlists transferred at once")
+    parser.add_argument("--no-dedupe", dest="dedupe", action="store_false",
+                        help="search shared tracks per playlist instead of once up front")
+    parser.add_argument("--order", default="given", help="playlist scheduling order")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-trace-memory", dest="trace_memory", action="store_false",
+                        help="skip tracemalloc (faster, no peak memory figure)")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON results from an earlier run to compare against")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    
+    results = []
+    for size in sizes:
+        results.append(run_once(size, args))
+        print(f"  {size} tracks done in {results[-1]['seconds']}s", file=sys.stderr)
+    
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)['results']
+    print_table(results, previous)
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
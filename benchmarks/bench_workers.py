@@ -0,0 +1,112 @@
+"""Job-queue scaling benchmark.
+
+Queues a simulated library, then drains it with 1, 2, 4... search workers,
+each standing in for a separate YouTube Music account with its own
+server-side rate limit, and reports search throughput per worker count.
+Workers run as threads against the shared SQLite queue; the owner-account
+insert pass is timed separately.
+
+    python benchmarks/bench_workers.py --tracks 2000 --workers 1,2,4 --max-rps 20
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+# Keep caches and journals out of the real app data directory
+_data_dir = tempfile.mkdtemp(prefix="spotify-to-ytmusic-bench-")
+os.environ["APPDATA"] = _data_dir
+os.environ["XDG_DATA_HOME"] = _data_dir
+
+from fake_services import FakeYTMusic, fake_track, make_library
+from job_queue import JobQueue
+from match_cache import MatchCache
+from metrics import MetricsRegistry
+from track import Track
+from worker import run_inserter, run_worker
+from youtube_client import YouTubeClient
+
+def make_client(args, seed):
+    # Separate caches, so every worker count does the same number of searches
+    youtube_client = YouTubeClient("bench", "bench", cache=MatchCache(":memory:"), max_workers=args.threads,
+                                   requests_per_second=args.max_rps, metrics=MetricsRegistry())
+    youtube_client.ytmusic = FakeYTMusic(miss_rate=args.miss_rate, latency=args.latency, jitter=args.jitter,
+                                         max_rps=args.max_rps, seed=seed)
+    return youtube_client
+
+def run_once(worker_count, args):
+    queue_path = os.path.join(_data_dir, f"queue-{worker_count}.db")
+    queue = JobQueue(queue_path)
+    library = make_library(args.tracks, args.playlists, overlap=0.0, seed=args.seed)
+    for playlist_id, playlist in library.items():
+        queue.enqueue_playlist(playlist_id, playlist['name'], [
+            Track(track['id'], track['name'], track['artists'][0]['name'], track['album']['name'],
+                  track['external_ids']['isrc'])
+            for track in map(fake_track, playlist['tracks'])
+        ])
+    
+    clients = [make_client(args, seed) for seed in range(worker_count)]
+    threads = [
+        threading.Thread(target=run_worker, args=(JobQueue(queue_path), client, f"bench-{idx}"),
+                         kwargs={'poll_interval': 0.1, 'on_status': lambda message: None})
+        for idx, client in enumerate(clients)
+    ]
+    started = time.perf_counter()
+    # Silence the clients' own diagnostic prints
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        searched = time.perf_counter()
+        owner = make_client(args, 1000)
+        inserted, _ = run_inserter(queue, owner, on_status=lambda message: None)
+    finished = time.perf_counter()
+    
+    counts = queue.counts()
+    queue.close()
+    search_seconds = searched - started
+    return {
+        'workers': worker_count,
+        'search_seconds': round(search_seconds, 3),
+        'tracks_per_sec': round(args.tracks / search_seconds, 1) if search_seconds else 0.0,
+        'insert_seconds': round(finished - searched, 3),
+        'done': counts['done'],
+        'failed': counts['failed'],
+        'playlists_inserted': inserted,
+        'throttled': sum(client.ytmusic.stats()['throttled'] for client in clients)
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=2000, help="tracks in the queued library")
+    parser.add_argument("--playlists", type=int, default=10, help="playlists in the library")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker (account) counts")
+    parser.add_argument("--threads", type=int, default=4, help="concurrent searches per worker")
+    parser.add_argument("--max-rps", type=float, default=20.0, help="per-account requests per second")
+    parser.add_argument("--latency", type=float, default=0.02, help="mean seconds per API call")
+    parser.add_argument("--jitter", type=float, default=0.01, help="+/- seconds added to latency")
+    parser.add_argument("--miss-rate", type=float, default=0.05, help="fraction of searches with no result")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    baseline = None
+    print(f"{'workers':>8} {'search s':>9} {'tracks/s':>9} {'speedup':>8} {'insert s':>9} {'done':>7} {'failed':>7} {'429s':>6}")
+    for worker_count in [int(count) for count in args.workers.split(",") if count]:
+        r = run_once(worker_count, args)
+        baseline = baseline or r['tracks_per_sec']
+        speedup = r['tracks_per_sec'] / baseline if baseline else 0.0
+        print(f"{r['workers']:>8} {r['search_seconds']:>9.2f} {r['tracks_per_sec']:>9.1f} {speedup:>7.2f}x "
+              f"{r['insert_seconds']:>9.2f} {r['done']:>7} {r['failed']:>7} {r['throttled']:>6}")
+
+if __name__ == "__main__":
+    main()
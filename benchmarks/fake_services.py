@@ -0,0 +1,247 @@
+"""Local stand-ins for the spotipy and YTMusic surfaces used by the clients.
+
+Both fakes generate a deterministic library, sleep for a configurable
+latency (plus jitter) on each call, and can inject server errors and
+HTTP 429 throttling so transfers can be benchmarked offline.
+"""
+import hashlib
+import random
+import re
+import threading
+import time
+from urllib.parse import urlparse, parse_qs
+
+class FakeHTTPError(Exception):
+    """Mirrors the status/headers attributes of spotipy and requests errors"""
+    
+    def __init__(self, status, message, headers=None):
+        super().__init__(f"Server returned HTTP {status}: {message}.")
+        self.http_status = status
+        self.status_code = status
+        self.headers = headers or {}
+
+class FakeBackend:
+    """Shared latency, error injection and server-side rate limiting"""
+    
+    def __init__(self, latency=0.05, jitter=0.02, error_rate=0.0, max_rps=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.max_rps = max_rps
+        self.calls = 0
+        self.errors = 0
+        self.throttled = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_calls = 0
+    
+    def _request(self):
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            fail = self._random.random() < self.error_rate
+            
+            if self.max_rps:
+                now = time.monotonic()
+                if now - self._window_start >= 1.0:
+                    self._window_start = now
+                    self._window_calls = 0
+                self._window_calls += 1
+                if self._window_calls > self.max_rps:
+                    self.throttled += 1
+                    retry_after = max(0.0, 1.0 - (now - self._window_start))
+                    raise FakeHTTPError(429, "Too Many Requests", {'Retry-After': f"{retry_after:.2f}"})
+        
+        if delay:
+            time.sleep(delay)
+        if fail:
+            with self._lock:
+                self.errors += 1
+            raise FakeHTTPError(503, "Service Unavailable")
+    
+    def stats(self):
+        return {'calls': self.calls, 'errors': self.errors, 'throttled': self.throttled}
+
+def make_library(total_tracks, playlist_count, overlap=0.3, seed=0):
+    """Split total_tracks across playlists drawing from a catalog with some repeats.
+    
+    Returns {playlist_id: {'name': ..., 'tracks': [track_number, ...]}}.
+    """
+    rng = random.Random(seed)
+    catalog_size = max(1, int(total_tracks * (1 - overlap)))
+    sizes = [total_tracks // playlist_count] * playlist_count
+    sizes[0] += total_tracks - sum(sizes)
+    library = {}
+    for idx, size in enumerate(sizes):
+        playlist_id = f"fakeplaylist{idx:04d}"
+        library[playlist_id] = {
+            'name': f"Benchmark Playlist {idx + 1}",
+            'tracks': [rng.randrange(catalog_size) for _ in range(size)]
+        }
+    return library
+
+def fake_track(number):
+    return {
+        'id': f"faketrack{number:08d}",
+        'name': f"Track {number}",
+        'duration_ms': 120000 + (number % 180) * 1000,
+        'artists': [{'name': f"Artist {number % 997}"}],
+        'album': {'name': f"Album {number % 4999}"},
+        'external_ids': {'isrc': f"QZFAK{number:07d}"}
+    }
+
+class FakeSpotify(FakeBackend):
+    """Implements the spotipy.Spotify methods used by SpotifyClient"""
+    
+    def __init__(self, library, **kwargs):
+        super().__init__(**kwargs)
+        self.library = library
+    
+    def _page(self, kind, items, total, limit, offset, playlist_id=None):
+        next_offset = offset + limit
+        next_url = None
+        if next_offset < total:
+            next_url = f"fake://{kind}/{playlist_id or ''}?offset={next_offset}&limit={limit}"
+        return {'items': items, 'total': total, 'limit': limit, 'offset': offset, 'next': next_url}
+    
+    def current_user_playlists(self, limit=50, offset=0):
+        self._request()
+        playlist_ids = list(self.library)
+        items = [
+            {
+                'id': playlist_id,
+                'name': self.library[playlist_id]['name'],
+                'owner': {'display_name': "benchmark"},
+                'snapshot_id': f"snap-{playlist_id}",
+                'tracks': {'total': len(self.library[playlist_id]['tracks'])}
+            }
+            for playlist_id in playlist_ids[offset:offset + limit]
+        ]
+        return self._page("playlists", items, len(playlist_ids), limit, offset)
+    
+    def playlist_tracks(self, playlist_id, fields=None, limit=100, offset=0, market=None,
+                        additional_types=("track",)):
+        self._request()
+        numbers = self.library[playlist_id]['tracks']
+        items = [{'track': fake_track(number)} for number in numbers[offset:offset + limit]]
+        return self._page("tracks", items, len(numbers), limit, offset, playlist_id)
+    
+    def playlist_items(self, playlist_id, fields=None, limit=100, offset=0, market=None,
+                       additional_types=("track", "episode")):
+        return self.playlist_tracks(playlist_id, fields, limit, offset, market, additional_types)
+    
+    def next(self, result):
+        if not result.get('next'):
+            return None
+        url = urlparse(result['next'])
+        params = parse_qs(url.query)
+        offset = int(params['offset'][0])
+        limit = int(params['limit'][0])
+        if url.netloc == "playlists":
+            return self.current_user_playlists(limit=limit, offset=offset)
+        return self.playlist_tracks(url.path.strip("/"), limit=limit, offset=offset)
+
+class FakeYTMusic(FakeBackend):
+    """Implements the YTMusic methods used by YouTubeClient"""
+    
+    def __init__(self, miss_rate=0.05, drop_rate=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.miss_rate = miss_rate
+        # Share of inserted items silently lost, like a partially failed insert
+        self.drop_rate = drop_rate
+        self.playlists = {}
+    
+    @staticmethod
+    def _video_id(text):
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()[:11]
+    
+    def search(self, query, filter=None, scope=None, limit=20, ignore_spelling=False):
+        self._request()
+        digest = int(hashlib.sha1(query.encode("utf-8")).hexdigest(), 16)
+        if (digest % 10000) / 10000 < self.miss_rate:
+            return []
+        number = re.match(r"Track (\d+)\b", query)
+        if number:
+            return self._catalog_results(int(number.group(1)), digest)[:limit]
+        return [
+            {
+                'resultType': "song",
+                'videoId': self._video_id(f"{query}#{rank}"),
+                'title': query,
+                'artists': [{'name': ""}],
+                'album': {'name': ""},
+                'duration_seconds': 120 + digest % 180
+            }
+            for rank in range(min(limit, 5))
+        ]
+    
+    def _catalog_results(self, number, digest):
+        """The song a fake_track query asks for among a live version, a remix and a cover;
+        about one in four times a wrong version ranks first"""
+        track = fake_track(number)
+        artist = track['artists'][0]['name']
+        seconds = track['duration_ms'] // 1000
+        results = [
+            (f"Track {number}", artist, track['album']['name'], seconds),
+            (f"Track {number} (Live)", artist, "Live Sessions", seconds + 40),
+            (f"Track {number} (Remix)", artist, "", seconds + 65),
+            (f"Track {number}", "Cover Band", "Covers", seconds - 8)
+        ]
+        if digest % 4 == 0:
+            results.insert(0, results.pop(1 + digest % 3))
+        return [
+            {
+                'resultType': "song",
+                'videoId': self._video_id(f"{title}|{result_artist}"),
+                'title': title,
+                'artists': [{'name': result_artist}],
+                'album': {'name': album},
+                'duration_seconds': duration
+            }
+            for title, result_artist, album, duration in results
+        ]
+    
+    def create_playlist(self, title, description, privacy_status="PRIVATE", video_ids=None,
+                        source_playlist=None):
+        self._request()
+        with self._lock:
+            playlist_id = f"PLfake{len(self.playlists):06d}"
+            self.playlists[playlist_id] = list(video_ids or [])
+        return playlist_id
+    
+    def add_playlist_items(self, playlistId, videoIds=None, source_playlist=None, duplicates=False):
+        self._request()
+        with self._lock:
+            playlist = self.playlists[playlistId]
+            present = set(playlist)
+            for video_id in videoIds or []:
+                # Like YouTube Music, repeats are dropped unless duplicates is set
+                if (video_id in present and not duplicates) or self._random.random() < self.drop_rate:
+                    continue
+                playlist.append(video_id)
+                present.add(video_id)
+        return {'status': "STATUS_SUCCEEDED"}
+    
+    def get_playlist(self, playlistId, limit=100, related=False, suggestions_limit=0):
+        self._request()
+        with self._lock:
+            video_ids = list(self.playlists[playlistId])
+        return {
+            'id': playlistId,
+            'trackCount': len(video_ids),
+            'tracks': [
+                {'videoId': video_id, 'setVideoId': f"{playlistId}:{position}"}
+                for position, video_id in enumerate(video_ids)
+            ]
+        }
+    
+    def remove_playlist_items(self, playlistId, videos):
+        self._request()
+        with self._lock:
+            drop = {video['setVideoId'] for video in videos}
+            self.playlists[playlistId] = [
+                video_id for position, video_id in enumerate(self.playlists[playlistId])
+                if f"{playlistId}:{position}" not in drop
+            ]
+        return "STATUS_SUCCEEDED"
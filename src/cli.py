@@ -0,0 +1,247 @@
+"""Headless command-line entry point.
+
+Runs transfers without a display (servers, cron, containers) and never
+imports tkinter. Credentials come from the environment or a .env file:
+
+    SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET,
+    YOUTUBE_CLIENT_ID, YOUTUBE_CLIENT_SECRET
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+from dotenv import load_dotenv
+from match_cache import MatchCache
+from metrics import start_http_server
+from paths import get_app_data_path
+from profiling import PROFILE_ENV, PROFILE_MODES
+from quota import WINDOWS, BudgetProgress, QuotaBudget
+from snapshot import SnapshotReader, write_snapshot
+from spotify_client import SpotifyClient
+from youtube_client import YouTubeClient
+from transfer import (ORDERS, order_playlists, plan_transfer, select_playlists, shard_playlists, run_sync,
+                      run_transfer)
+
+def parse_shard(value):
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected I/N, e.g. 1/4, not {value!r}")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {value} is out of range")
+    return index, count
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="spotify-to-ytmusic",
+        description="Transfer Spotify playlists to YouTube Music without the GUI."
+    )
+    parser.add_argument("-p", "--playlist", action="append", default=[], metavar="NAME_OR_ID",
+                        help="playlist name or Spotify ID to transfer (repeatable)")
+    parser.add_argument("-m", "--match", metavar="REGEX",
+                        help="transfer every playlist whose name matches this regex")
+    parser.add_argument("--all", action="store_true", help="transfer every playlist")
+    parser.add_argument("--list", action="store_true", help="list playlists and exit")
+    parser.add_argument("--env-file", default=".env", help="dotenv file to read credentials from")
+    parser.add_argument("--oauth-file", default="oauth.json", help="YouTube Music oauth file")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent YouTube searches")
+    parser.add_argument("--rate", type=float, default=3.0, help="YouTube requests per second")
+    parser.add_argument("--parallel", type=int, default=1, help="playlists transferred at once")
+    parser.add_argument("--no-dedupe", dest="dedupe", action="store_false",
+                        help="search shared tracks per playlist instead of once up front")
+    parser.add_argument("--order", choices=ORDERS, default="given",
+                        help="playlist scheduling order")
+    parser.add_argument("--pin", action="append", default=[], metavar="NAME_OR_ID",
+                        help="transfer this playlist before the others (repeatable, in priority order)")
+    parser.add_argument("--budget", type=int, metavar="REQUESTS",
+                        help="stop cleanly after this many YouTube Music requests per --budget-window")
+    parser.add_argument("--budget-window", choices=WINDOWS, default="day",
+                        help="window the request budget applies to (resets on the hour / at midnight)")
+    parser.add_argument("--wait-for-quota", action="store_true",
+                        help="when the budget is spent, wait for the next window and continue")
+    parser.add_argument("--reset-progress", action="store_true",
+                        help="forget which playlists earlier --budget runs finished and transfer them again")
+    parser.add_argument("--sync", action="store_true",
+                        help="only push changes since the last sync (skips unchanged playlists)")
+    parser.add_argument("--remove-deleted", action="store_true",
+                        help="with --sync, remove tracks that were deleted on Spotify")
+    parser.add_argument("--plan", action="store_true",
+                        help="dry run: estimate searches, API calls and time without writing to YouTube Music")
+    parser.add_argument("--export-snapshot", metavar="PATH",
+                        help="save the selected playlists' tracks to a snapshot file and exit")
+    parser.add_argument("--from-snapshot", metavar="PATH",
+                        help="read playlists from a snapshot file instead of Spotify (no Spotify login)")
+    parser.add_argument("--shard", type=parse_shard, metavar="I/N",
+                        help="only handle shard I of N of the selected playlists, e.g. 2/4")
+    parser.add_argument("--load-isrc-index", metavar="CSV",
+                        help="bulk-load 'isrc,videoId' rows into the local ISRC index before transferring")
+    parser.add_argument("--verify", action="store_true",
+                        help="read each playlist back afterwards and re-add any tracks that didn't make it")
+    parser.add_argument("--summary", metavar="PATH",
+                        help="write a JSON summary here ('-' for stdout)")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics during the run")
+    parser.add_argument("--profile", choices=PROFILE_MODES,
+                        help=f"profile each playlist (also enabled by {PROFILE_ENV})")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every track")
+    return parser.parse_args(argv)
+
+def require_env(name):
+    value = os.environ.get(name)
+    if not value:
+        raise SystemExit(f"Missing {name} - set it in the environment or the .env file")
+    return value
+
+def finished_result(playlist):
+    """Summary entry of a playlist an earlier budgeted run already transferred"""
+    return {
+        'id': playlist['id'],
+        'name': playlist['name'],
+        'tracks': playlist['tracks']['total'],
+        'transferred': 0,
+        'success': True,
+        'status': 'done earlier'
+    }
+
+def run_in_windows(args, spotify_client, youtube_client, playlists, quota, log, progress=None):
+    """Run the transfer or sync; with --wait-for-quota, rerun deferred playlists in each new budget window.
+    
+    With progress (a BudgetProgress), playlists finished by earlier runs are
+    skipped and ones they deferred are scheduled right after --pin.
+    """
+    results = {}
+    remaining = playlists
+    pinned = list(args.pin)
+    if progress:
+        finished = [playlist for playlist in playlists if playlist['id'] in progress.done]
+        if finished:
+            log(f"⏭️ Skipping {len(finished)} playlists finished by an earlier --budget run "
+                f"(--reset-progress transfers them again)")
+        for playlist in finished:
+            results[playlist['id']] = finished_result(playlist)
+        remaining = [playlist for playlist in playlists if playlist['id'] not in progress.done]
+        pinned += [id for id in progress.deferred if id not in pinned]
+    while True:
+        if args.sync:
+            summary = run_sync(spotify_client, youtube_client, order_playlists(remaining, args.order, args.pin),
+                               remove_deleted=args.remove_deleted, profile=args.profile, verify=args.verify,
+                               on_status=log, on_track=log if args.verbose else None)
+        else:
+            summary = run_transfer(spotify_client, youtube_client, remaining,
+                                   on_status=log, on_track=log if args.verbose else None,
+                                   max_parallel=args.parallel, order=args.order, dedupe=args.dedupe,
+                                   profile=args.profile, pinned=pinned, verify=args.verify)
+        for result in summary['playlists']:
+            results[result['id']] = result
+        if quota:
+            quota.save()
+        if progress:
+            progress.record(summary['playlists'])
+        
+        deferred = {result['id'] for result in summary['playlists'] if result.get('deferred')}
+        if not deferred or not args.wait_for_quota:
+            break
+        quota.wait_for_reset(log)
+        remaining = [playlist for playlist in remaining if playlist['id'] in deferred]
+    
+    # Report every playlist's latest outcome, in the order they were selected
+    summary['playlists'] = [results[playlist['id']] for playlist in playlists]
+    summary['success'] = all(result['success'] for result in summary['playlists'])
+    return summary
+
+def main(argv=None):
+    args = parse_args(argv)
+    load_dotenv(args.env_file)
+    
+    if args.metrics_port:
+        start_http_server(args.metrics_port)
+        print(f"Serving metrics on http://127.0.0.1:{args.metrics_port}/metrics", file=sys.stderr)
+    
+    if args.load_isrc_index:
+        cache = MatchCache()
+        try:
+            loaded = cache.load_isrc_index(args.load_isrc_index)
+        finally:
+            cache.close()
+        print(f"Loaded {loaded} ISRCs into the index", file=sys.stderr)
+        if not (args.list or args.all or args.playlist or args.match):
+            return 0
+    
+    if args.from_snapshot:
+        spotify_client = SnapshotReader(args.from_snapshot)
+    else:
+        spotify_client = SpotifyClient(require_env("SPOTIFY_CLIENT_ID"), require_env("SPOTIFY_CLIENT_SECRET"))
+        spotify_client.authenticate()
+    playlists = spotify_client.get_playlists()
+    
+    if args.list:
+        for playlist in playlists:
+            print(f"{playlist['id']}\t{playlist['tracks']['total']}\t{playlist['name']}")
+        return 0
+    
+    if args.all:
+        selected = playlists
+    else:
+        selected = select_playlists(playlists, args.playlist, args.match)
+    if args.shard:
+        selected = shard_playlists(selected, *args.shard)
+    if not selected:
+        print("No playlists selected - use --playlist, --match or --all", file=sys.stderr)
+        return 2
+    
+    if args.export_snapshot:
+        count = write_snapshot(args.export_snapshot, spotify_client, selected,
+                               on_status=lambda message: print(message, file=sys.stderr))
+        print(f"Saved {len(selected)} playlists ({count} tracks) to {args.export_snapshot}", file=sys.stderr)
+        return 0
+    
+    # Status lines go to stderr so a '-' summary stays machine-readable on stdout
+    def log(message):
+        print(message, file=sys.stderr, flush=True)
+    
+    # One budget file per account, since each account has its own quota
+    quota = None
+    progress = None
+    if args.budget:
+        account = os.path.splitext(os.path.basename(args.oauth_file))[0]
+        quota = QuotaBudget(args.budget, args.budget_window, get_app_data_path(f"quota-{account}.json"))
+        # Sync already skips unchanged playlists by their snapshot, so only transfers need this
+        if not args.sync:
+            progress = BudgetProgress(get_app_data_path(f"progress-{account}.json"))
+            if args.reset_progress:
+                progress.reset()
+    
+    if args.plan:
+        # A plan only reads the local caches, so it needs no YouTube sign-in
+        youtube_client = YouTubeClient(
+            os.environ.get("YOUTUBE_CLIENT_ID"), os.environ.get("YOUTUBE_CLIENT_SECRET"),
+            max_workers=args.workers, requests_per_second=args.rate, oauth_file=args.oauth_file, quota=quota
+        )
+    else:
+        youtube_client = YouTubeClient(
+            require_env("YOUTUBE_CLIENT_ID"), require_env("YOUTUBE_CLIENT_SECRET"),
+            max_workers=args.workers, requests_per_second=args.rate, oauth_file=args.oauth_file, quota=quota
+        )
+        youtube_client.authenticate()
+    
+    # Client diagnostics are printed, so keep them off stdout when it carries the summary
+    with contextlib.redirect_stdout(sys.stderr if args.summary == "-" else sys.stdout):
+        if args.plan:
+            if progress:
+                selected = [playlist for playlist in selected if playlist['id'] not in progress.done]
+            summary = plan_transfer(spotify_client, youtube_client, selected, on_status=log)
+        else:
+            summary = run_in_windows(args, spotify_client, youtube_client, selected, quota, log, progress)
+    
+    if args.summary == "-":
+        json.dump(summary, sys.stdout, indent=2)
+        print()
+    elif args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+    
+    return 0 if summary.get('success', True) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
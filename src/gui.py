@@ -1,8 +1,20 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
+import json
+import queue
 import threading
+import time
 from spotify_client import SpotifyClient
 from youtube_client import YouTubeClient
+from transfer import ORDERS, plan_transfer, run_sync, run_transfer
+from paths import get_app_data_path
+from playlist_picker import PlaylistPicker
+
+# Worker threads never touch widgets; they queue events that the Tk loop
+# drains in batches every EVENT_POLL_MS
+EVENT_POLL_MS = 100
+EVENT_BATCH_SIZE = 2000
+LOG_MAX_LINES = 1000
 
 class SpotifyToYouTubeApp:
     def __init__(self):
@@ -20,12 +32,17 @@ class SpotifyToYouTubeApp:
         self.spotify_client = None
         self.youtube_client = None
         self.playlists = []
+        self.events = queue.Queue()
+        self.log_file = None
+        self.summary_path = None
         
         # Configure styles
         self.configure_styles()
         
         # Create main UI
         self.create_widgets()
+        
+        self.root.after(EVENT_POLL_MS, self.process_events)
     
     def center_window(self):
         self.root.update_idletasks()
@@ -82,6 +99,10 @@ class SpotifyToYouTubeApp:
                        font=('Segoe UI', 10),
                        background='white',
                        foreground='#e74c3c')
+        
+        style.configure("Card.TCheckbutton",
+                       font=('Segoe UI', 10),
+                       background='white')
     
     def create_widgets(self):
         # Main container
@@ -268,33 +289,77 @@ class SpotifyToYouTubeApp:
         selection_frame = ttk.Frame(transfer_card, style="Card.TFrame")
         selection_frame.pack(fill="both", expand=True, pady=(0, 20))
         
-        # Playlist listbox with scrollbar
-        list_frame = ttk.Frame(selection_frame)
-        list_frame.pack(fill="both", expand=True)
-        
-        self.playlist_listbox = tk.Listbox(list_frame, 
-                                         selectmode="multiple",
-                                         font=('Segoe UI', 10),
-                                         borderwidth=1,
-                                         highlightthickness=0,
-                                         selectbackground='#1DB954',
-                                         selectforeground='white')
-        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.playlist_listbox.yview)
-        
-        self.playlist_listbox.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        self.playlist_listbox.config(yscrollcommand=scrollbar.set)
+        # Filterable playlist list; only the rows on screen are drawn
+        self.playlist_picker = PlaylistPicker(selection_frame)
+        self.playlist_picker.pack(fill="both", expand=True)
         
         # Transfer button and progress
         controls_frame = ttk.Frame(transfer_card, style="Card.TFrame")
         controls_frame.pack(fill="x", pady=(0, 20))
         
+        # Scheduling options
+        options_frame = ttk.Frame(controls_frame, style="Card.TFrame")
+        options_frame.pack(pady=(0, 10))
+        
+        ttk.Label(options_frame, 
+                 text="Playlists at once", 
+                 font=('Segoe UI', 10),
+                 background='white').pack(side="left", padx=(0, 5))
+        
+        self.parallel_var = tk.IntVar(value=1)
+        ttk.Spinbox(options_frame, 
+                   from_=1, 
+                   to=8, 
+                   width=4, 
+                   textvariable=self.parallel_var, 
+                   state="readonly").pack(side="left", padx=(0, 20))
+        
+        ttk.Label(options_frame, 
+                 text="Order", 
+                 font=('Segoe UI', 10),
+                 background='white').pack(side="left", padx=(0, 5))
+        
+        self.order_var = tk.StringVar(value=ORDERS[0])
+        ttk.Combobox(options_frame, 
+                    values=ORDERS, 
+                    width=14, 
+                    textvariable=self.order_var, 
+                    state="readonly").pack(side="left")
+        
+        # Incremental sync options
+        sync_frame = ttk.Frame(controls_frame, style="Card.TFrame")
+        sync_frame.pack(pady=(0, 10))
+        
+        self.sync_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(sync_frame, 
+                       text="Sync changes only", 
+                       variable=self.sync_var, 
+                       style="Card.TCheckbutton").pack(side="left", padx=(0, 20))
+        
+        self.remove_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(sync_frame, 
+                       text="Remove tracks deleted on Spotify", 
+                       variable=self.remove_var, 
+                       style="Card.TCheckbutton").pack(side="left", padx=(0, 20))
+        
+        self.verify_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(sync_frame, 
+                       text="Verify and re-add missing", 
+                       variable=self.verify_var, 
+                       style="Card.TCheckbutton").pack(side="left")
+        
         self.transfer_btn = ttk.Button(controls_frame, 
                                      text="Start Transfer", 
                                      style="Transfer.TButton",
                                      command=self.start_transfer)
         self.transfer_btn.pack(pady=(0, 10))
         
+        # Dry run: estimates searches, API calls and time without writing anything
+        self.plan_btn = ttk.Button(controls_frame, 
+                                 text="Estimate Only", 
+                                 command=lambda: self.start_transfer(plan=True))
+        self.plan_btn.pack(pady=(0, 10))
+        
         # Progress bar
         self.progress = ttk.Progressbar(controls_frame, mode='determinate', length=400)
         self.progress.pack(pady=10)
@@ -338,18 +403,24 @@ class SpotifyToYouTubeApp:
             try:
                 self.spotify_client = SpotifyClient(client_id, client_secret)
                 self.spotify_client.authenticate()
-                self.playlists = self.spotify_client.get_playlists()
+                
+                # Show playlists page by page as they arrive
+                self.playlists = []
+                self.call_in_ui(self.playlist_picker.clear)
+                for page in self.spotify_client.iter_playlist_pages():
+                    self.playlists.extend(page)
+                    self.call_in_ui(lambda page=page: self.playlist_picker.append(page))
                 
                 self.root.after(0, lambda: self.spotify_status.config(
                     text=f"✓ Connected - Found {len(self.playlists)} playlists",
                     style="Success.TLabel"))
-                self.root.after(0, self.update_playlist_list)
                 self.root.after(0, lambda: messagebox.showinfo("Success", "Connected to Spotify successfully!"))
             except Exception as e:
+                message = str(e)
                 self.root.after(0, lambda: self.spotify_status.config(
-                    text=f"✗ Connection failed: {str(e)}",
+                    text=f"✗ Connection failed: {message}",
                     style="Error.TLabel"))
-                self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to connect to Spotify: {str(e)}"))
+                self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to connect to Spotify: {message}"))
             finally:
                 self.root.after(0, lambda: self.spotify_connect_btn.config(
                     state="normal", text="Connect to Spotify"))
@@ -377,10 +448,11 @@ class SpotifyToYouTubeApp:
                     style="Success.TLabel"))
                 self.root.after(0, lambda: messagebox.showinfo("Success", "Connected to YouTube Music successfully!"))
             except Exception as e:
+                message = str(e)
                 self.root.after(0, lambda: self.youtube_status.config(
-                    text=f"✗ Connection failed: {str(e)}",
+                    text=f"✗ Connection failed: {message}",
                     style="Error.TLabel"))
-                self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to connect to YouTube Music: {str(e)}"))
+                self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to connect to YouTube Music: {message}"))
             finally:
                 self.root.after(0, lambda: self.youtube_connect_btn.config(
                     state="normal", text="Connect to YouTube Music"))
@@ -388,66 +460,140 @@ class SpotifyToYouTubeApp:
         thread = threading.Thread(target=connect)
         thread.start()
     
-    def update_playlist_list(self):
-        self.playlist_listbox.delete(0, tk.END)
-        for playlist in self.playlists:
-            self.playlist_listbox.insert(tk.END, f"  {playlist['name']} ({playlist['tracks']['total']} tracks)")
-    
-    def start_transfer(self):
-        if not self.spotify_client or not self.youtube_client:
+    def start_transfer(self, plan=False):
+        if not self.spotify_client:
+            messagebox.showerror("Error", "Please connect to Spotify first")
+            return
+        # A plan only reads the local caches, so YouTube Music can stay disconnected
+        if not plan and not self.youtube_client:
             messagebox.showerror("Error", "Please connect to both Spotify and YouTube Music first")
             return
         
-        selected_indices = self.playlist_listbox.curselection()
-        if not selected_indices:
+        selected = self.playlist_picker.get_selected()
+        if not selected:
             messagebox.showerror("Error", "Please select at least one playlist")
             return
         
         self.transfer_btn.config(state="disabled")
+        self.plan_btn.config(state="disabled")
         self.progress['value'] = 0
-        thread = threading.Thread(target=self.transfer_playlists, args=(selected_indices,))
+        
+        # The widget only keeps the last LOG_MAX_LINES; the full log goes to a file
+        prefix = "plan" if plan else "transfer"
+        log_path = get_app_data_path("logs", time.strftime(f"{prefix}-%Y%m%d-%H%M%S.log"))
+        self.log_file = open(log_path, 'a', encoding='utf-8')
+        self.summary_path = log_path[:-len(".log")] + ".json"
+        self.update_status(f"📝 Full log: {log_path}")
+        
+        # Each run's summary carries only its own metrics
+        if self.youtube_client:
+            self.youtube_client.metrics.reset()
+        
+        thread = threading.Thread(target=self.transfer_playlists, 
+                                  args=(selected, self.parallel_var.get(), self.order_var.get(),
+                                        self.sync_var.get(), self.remove_var.get(), plan, self.verify_var.get()))
         thread.start()
     
-    def transfer_playlists(self, selected_indices):
-        total_playlists = len(selected_indices)
-        
-        for idx, playlist_idx in enumerate(selected_indices):
-            playlist = self.playlists[playlist_idx]
-            name = playlist['name']
-            
-            self.update_status(f"\n🎵 Transferring: {name}")
-            self.progress_label.config(text=f"Processing playlist {idx + 1} of {total_playlists}")
-            
-            tracks = self.spotify_client.get_playlist_tracks(playlist['id'])
-            self.update_status(f"📋 Found {len(tracks)} tracks in '{name}'")
-            
-            def progress_callback(current, total, status):
-                progress_value = ((idx * 100) + (current / total * 100)) / total_playlists
-                self.progress['value'] = progress_value
-                
-                if "Added" in status:
-                    self.update_status(f"✓ {status}")
-                else:
-                    self.update_status(f"⚠️ {status}")
-            
-            success, transferred_count = self.youtube_client.create_playlist_and_add_tracks(
-                name, tracks, progress_callback
-            )
-            
-            if success:
-                self.update_status(f"✅ Successfully transferred '{name}' ({transferred_count}/{len(tracks)} tracks)\n")
+    def transfer_playlists(self, playlists, max_parallel=1, order="given", sync=False, remove_deleted=False,
+                           plan=False, verify=False):
+        try:
+            if plan:
+                youtube_client = self.youtube_client or YouTubeClient(None, None)
+                summary = plan_transfer(self.spotify_client, youtube_client, playlists,
+                                        on_status=self.update_status, on_progress=self.update_progress)
+                with open(self.summary_path, 'w', encoding='utf-8') as f:
+                    json.dump(summary, f, indent=2)
+                self.update_status(f"📊 Plan: {self.summary_path}")
+                return
+            if sync:
+                summary = run_sync(self.spotify_client, self.youtube_client, playlists,
+                                   remove_deleted=remove_deleted, on_status=self.update_status,
+                                   on_progress=self.update_progress, on_track=self.update_status, verify=verify)
             else:
-                self.update_status(f"❌ Failed to transfer '{name}'\n")
-        
-        self.update_status("\n🎉 Transfer complete!")
-        self.progress_label.config(text="Transfer completed!")
+                summary = run_transfer(self.spotify_client, self.youtube_client, playlists,
+                                       on_status=self.update_status, on_progress=self.update_progress,
+                                       on_track=self.update_status, max_parallel=max_parallel, order=order,
+                                       verify=verify)
+            with open(self.summary_path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2)
+            self.update_status(f"📊 Summary and metrics: {self.summary_path}")
+            self.update_status("\n🎉 Transfer complete!")
+            self.update_progress(100, "Transfer completed!")
+            self.call_in_ui(lambda: messagebox.showinfo("Complete", "Transfer completed!"))
+        except Exception as e:
+            # e is cleared when the except block ends, before the UI runs the callback
+            message = str(e)
+            self.update_status(f"\n❌ Transfer stopped: {message}")
+            self.call_in_ui(lambda message=message: messagebox.showerror("Error", f"Transfer stopped: {message}"))
+        finally:
+            self.call_in_ui(self.finish_transfer)
+    
+    def finish_transfer(self):
         self.transfer_btn.config(state="normal")
-        messagebox.showinfo("Complete", "Transfer completed!")
+        self.plan_btn.config(state="normal")
+        if self.log_file:
+            self.log_file.close()
+            self.log_file = None
     
     def update_status(self, message):
-        self.status_text.insert(tk.END, message + "\n")
+        """Queue a log line; safe to call from any thread"""
+        self.events.put(('log', message))
+    
+    def update_progress(self, value, label=None):
+        """Queue a progress update; only the latest one per batch is drawn"""
+        self.events.put(('progress', (value, label)))
+    
+    def call_in_ui(self, callback):
+        """Run callback on the Tk thread after the queued events before it"""
+        self.events.put(('call', callback))
+    
+    def process_events(self):
+        lines = []
+        progress_value = None
+        progress_label = None
+        try:
+            for _ in range(EVENT_BATCH_SIZE):
+                kind, payload = self.events.get_nowait()
+                if kind == 'log':
+                    lines.append(payload)
+                elif kind == 'progress':
+                    progress_value = payload[0]
+                    progress_label = payload[1] or progress_label
+                else:
+                    # Flush what came before so callbacks see the log in order
+                    self.append_log(lines)
+                    lines = []
+                    try:
+                        payload()
+                    except Exception as e:
+                        # One broken callback must not stop the pump
+                        lines.append(f"⚠️ UI update failed: {str(e)}")
+        except queue.Empty:
+            pass
+        finally:
+            self.append_log(lines)
+            if progress_value is not None:
+                self.progress['value'] = progress_value
+            if progress_label:
+                self.progress_label.config(text=progress_label)
+            
+            self.root.after(EVENT_POLL_MS, self.process_events)
+    
+    def append_log(self, lines):
+        if not lines:
+            return
+        
+        text = "\n".join(lines) + "\n"
+        if self.log_file:
+            self.log_file.write(text)
+            self.log_file.flush()
+        
+        # Only the tail of a batch can stay on screen anyway
+        self.status_text.insert(tk.END, "\n".join(lines[-LOG_MAX_LINES:]) + "\n")
+        line_count = int(self.status_text.index('end-1c').split('.')[0])
+        if line_count > LOG_MAX_LINES:
+            self.status_text.delete('1.0', f"{line_count - LOG_MAX_LINES}.0")
         self.status_text.see(tk.END)
-        self.root.update()
     
     def run(self):
         self.root.mainloop()
\ No newline at end of file
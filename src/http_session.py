@@ -0,0 +1,84 @@
+"""Pooled requests sessions shared by the API clients.
+
+One session per service keeps TLS connections alive across calls, sizes the
+connection pool to the client's concurrency (so parallel workers don't
+discard and re-open connections), applies a default timeout to every
+request and asks for compressed responses. Import this module lazily: it
+loads requests.
+"""
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT = (5, 30)  # (connect, read) seconds
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout when the caller passes none"""
+    
+    def __init__(self, *args, timeout=DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+    
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+def accept_encoding():
+    """gzip and deflate, plus brotli when a decoder for it is installed"""
+    encodings = ["gzip", "deflate"]
+    for module in ("brotli", "brotlicffi"):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        encodings.append("br")
+        break
+    return ", ".join(encodings)
+
+def create_session(pool_size=10, timeout=DEFAULT_TIMEOUT, max_retries=None, compress=True):
+    """Build a keep-alive session with pool_size connections per host.
+    
+    max_retries is an int or a urllib3 Retry; by default only connections
+    that fail to open are retried, since the clients retry HTTP errors
+    themselves.
+    """
+    if max_retries is None:
+        max_retries = Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.2)
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=pool_size,
+        max_retries=max_retries,
+        timeout=timeout
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers['Connection'] = "keep-alive"
+    session.headers['Accept-Encoding'] = accept_encoding() if compress else "identity"
+    return session
+
+def create_spotify_session(pool_size=16, timeout=DEFAULT_TIMEOUT, compress=True):
+    """Session for spotipy.
+    
+    spotipy only installs its own retry adapter on sessions it creates, so
+    this one carries the equivalent: up to 3 retries of 429 and 5xx
+    responses honouring Retry-After.
+    """
+    retry = Retry(
+        total=3,
+        connect=3,
+        read=3,
+        status=3,
+        backoff_factor=0.3,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE"]),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    return create_session(pool_size, timeout, retry, compress)
+
+def create_youtube_session(pool_size=16, timeout=DEFAULT_TIMEOUT, compress=True):
+    """Session for YTMusic; HTTP errors are left to YouTubeClient's RetryPolicy"""
+    return create_session(pool_size, timeout, None, compress)
@@ -0,0 +1,192 @@
+import json
+import sqlite3
+import threading
+import time
+from match_cache import track_keys
+from paths import get_app_data_path
+from track import Track
+
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 5
+
+class JobQueue:
+    """Persistent SQLite queue of (playlist, track) search jobs shared by worker processes.
+    
+    Workers claim batches under a lease; a job whose lease runs out (the
+    worker crashed or hung) becomes claimable again, up to max_attempts.
+    Results stay in the queue until the owner account inserts them.
+    """
+    
+    def __init__(self, path=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.path = path or get_app_data_path("job_queue.db")
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # Autocommit mode, so claims can take the write lock with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS playlists ("
+            "playlist_id TEXT PRIMARY KEY, "
+            "name TEXT NOT NULL, "
+            "youtube_playlist_id TEXT, "
+            "inserted INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY, "
+            "playlist_id TEXT NOT NULL, "
+            "position INTEGER NOT NULL, "
+            "track_key TEXT NOT NULL, "
+            "track TEXT NOT NULL, "
+            "state TEXT NOT NULL DEFAULT 'pending', "
+            "video_id TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "lease_owner TEXT, "
+            "lease_expires REAL, "
+            "error TEXT, "
+            "UNIQUE (playlist_id, position))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(state, lease_expires)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_playlist ON jobs(playlist_id, state)")
+    
+    def enqueue_playlist(self, playlist_id, name, tracks):
+        """Add a playlist's tracks; returns how many jobs were new"""
+        rows = [
+            (playlist_id, position, track_keys(track)[0], json.dumps(dict(track)))
+            for position, track in enumerate(tracks, 1)
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO playlists (playlist_id, name) VALUES (?, ?)",
+                    (playlist_id, name)
+                )
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO jobs (playlist_id, position, track_key, track) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+                added = self._conn.total_changes - before
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return added
+    
+    def claim(self, worker_id, limit=20, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Lease up to limit pending (or expired) jobs; returns [(job_id, track), ...]"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, track FROM jobs "
+                    "WHERE (state = 'pending' OR (state = 'leased' AND lease_expires < ?)) "
+                    "AND attempts < ? ORDER BY id LIMIT ?",
+                    (now, self.max_attempts, limit)
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE jobs SET state = 'leased', lease_owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1 WHERE id = ?",
+                    [(worker_id, now + lease_seconds, job_id) for job_id, _ in rows]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [(job_id, Track.from_dict(json.loads(track))) for job_id, track in rows]
+    
+    def complete(self, worker_id, results):
+        """Store [(job_id, video_id or None), ...] for jobs this worker still holds"""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE jobs SET state = 'done', video_id = ?, lease_owner = NULL, lease_expires = NULL "
+                "WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                [(video_id, job_id, worker_id) for job_id, video_id in results]
+            )
+    
+    def fail(self, worker_id, job_id, error):
+        """Release a job after an error; it is retried until max_attempts"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, lease_owner = NULL, lease_expires = NULL "
+                "WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                (self.max_attempts, str(error), job_id, worker_id)
+            )
+    
+    def release(self, worker_id):
+        """Hand back every job the worker holds without counting an attempt (clean shutdown)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET state = 'pending', attempts = MAX(0, attempts - 1), "
+                "lease_owner = NULL, lease_expires = NULL "
+                "WHERE state = 'leased' AND lease_owner = ?",
+                (worker_id,)
+            )
+    
+    def counts(self, playlist_id=None):
+        """Return {state: count}; expired leases count as pending, or failed once out of attempts"""
+        query = (
+            "SELECT CASE WHEN state = 'leased' AND lease_expires < ? "
+            "THEN CASE WHEN attempts < ? THEN 'pending' ELSE 'failed' END ELSE state END, "
+            "COUNT(*) FROM jobs"
+        )
+        params = [time.time(), self.max_attempts]
+        if playlist_id:
+            query += " WHERE playlist_id = ?"
+            params.append(playlist_id)
+        query += " GROUP BY 1"
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        with self._lock:
+            for state, count in self._conn.execute(query, params):
+                counts[state] += count
+        return counts
+    
+    def playlists(self):
+        """Return every queued playlist as a dict"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT playlist_id, name, youtube_playlist_id, inserted FROM playlists ORDER BY rowid"
+            ).fetchall()
+        return [
+            {'id': playlist_id, 'name': name, 'youtube_playlist_id': youtube_playlist_id, 'inserted': bool(inserted)}
+            for playlist_id, name, youtube_playlist_id, inserted in rows
+        ]
+    
+    def is_ready(self, playlist_id):
+        """True once no job of the playlist is pending or leased"""
+        counts = self.counts(playlist_id)
+        return counts['pending'] == 0 and counts['leased'] == 0
+    
+    def results(self, playlist_id):
+        """Return (tracks, resolved) for a finished playlist.
+        
+        resolved maps track key to videoId (or None when not found) in the
+        format create_playlist_and_add_tracks accepts; failed jobs are left
+        out so the inserting account searches them one last time.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT track_key, track, state, video_id FROM jobs WHERE playlist_id = ? ORDER BY position",
+                (playlist_id,)
+            ).fetchall()
+        tracks = []
+        resolved = {}
+        for key, track, state, video_id in rows:
+            tracks.append(Track.from_dict(json.loads(track)))
+            if state == 'done':
+                resolved[key] = video_id
+        return tracks, resolved
+    
+    def mark_inserted(self, playlist_id, youtube_playlist_id):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE playlists SET youtube_playlist_id = ?, inserted = 1 WHERE playlist_id = ?",
+                (youtube_playlist_id, playlist_id)
+            )
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -10,8 +10,12 @@ else:
 
 sys.path.insert(0, application_path)
 
-from gui import SpotifyToYouTubeApp
-
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Any command-line arguments select the headless mode, which never loads tkinter
+        from cli import main
+        sys.exit(main())
+    
+    from gui import SpotifyToYouTubeApp
     app = SpotifyToYouTubeApp()
     app.run()
\ No newline at end of file
@@ -0,0 +1,245 @@
+import csv
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from paths import get_app_data_path
+
+DEFAULT_MAX_ENTRIES = 200000
+# Tracks that weren't found are searched again after this long, in case they were added since
+DEFAULT_MISS_TTL = 14 * 24 * 3600
+# Worker processes share the file, so wait for a writer rather than fail with "database is locked"
+BUSY_TIMEOUT = 60.0
+# LRU touches are written, and the size limit checked, once per this many hits or puts
+WRITE_BATCH = 100
+
+def normalize_text(value):
+    """Lowercase, strip accents/punctuation and collapse whitespace"""
+    value = unicodedata.normalize("NFKD", value or "")
+    value = "".join(c for c in value if not unicodedata.combining(c))
+    value = re.sub(r"[^\w\s]", " ", value.lower())
+    return " ".join(value.split())
+
+def normalize_isrc(value):
+    """Return an ISRC in its compact 12-character form, or None if it isn't one"""
+    value = re.sub(r"[\s-]", "", value or "").upper()
+    return value if re.fullmatch(r"[A-Z]{2}[A-Z0-9]{3}\d{7}", value) else None
+
+def track_keys(track_info):
+    """Return the cache keys for a track, most specific first"""
+    keys = []
+    if track_info.get('id'):
+        keys.append(f"sp:{track_info['id']}")
+    keys.append("t:" + "|".join(
+        normalize_text(track_info.get(field)) for field in ('title', 'artist', 'album')
+    ))
+    return keys
+
+class MatchCache:
+    """Persistent SQLite cache mapping tracks to resolved YouTube Music videoIds.
+    
+    Alongside the LRU-evicted matches it keeps an ISRC index: every match of a
+    track with an ISRC is recorded there, and it can be bulk-loaded from a file.
+    ISRCs identify the exact recording, so index entries are never evicted.
+    Confirmed misses are remembered for miss_ttl seconds so reruns don't
+    search them again. The file is opened in WAL mode so several processes
+    can share it; LRU updates are batched, so max_entries may be exceeded
+    by up to WRITE_BATCH entries between checks.
+    """
+    
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES, miss_ttl=DEFAULT_MISS_TTL):
+        self.path = path or get_app_data_path("match_cache.db")
+        self.max_entries = max_entries
+        self.miss_ttl = miss_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched = {}
+        self._puts = 0
+        self._conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        # Readers don't block the writer and vice versa
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS matches ("
+            "key TEXT PRIMARY KEY, "
+            "video_id TEXT NOT NULL, "
+            "last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_matches_last_used ON matches(last_used)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS isrc_index ("
+            "isrc TEXT PRIMARY KEY, "
+            "video_id TEXT NOT NULL, "
+            "source TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS not_found ("
+            "key TEXT PRIMARY KEY, "
+            "checked REAL NOT NULL)"
+        )
+        self._conn.commit()
+    
+    def get_isrc(self, isrc):
+        """Return the indexed videoId for an ISRC, or None"""
+        isrc = normalize_isrc(isrc)
+        if not isrc:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT video_id FROM isrc_index WHERE isrc = ?", (isrc,)).fetchone()
+        return row[0] if row else None
+    
+    def load_isrc_index(self, path):
+        """Bulk-load 'isrc,videoId' rows from a CSV file; returns how many were loaded.
+        
+        A header row and rows without a valid ISRC are skipped. Loaded entries
+        replace matches previously learned from search.
+        """
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = [
+                (normalize_isrc(row[0]), row[1].strip(), "import")
+                for row in csv.reader(f)
+                if len(row) >= 2 and normalize_isrc(row[0]) and row[1].strip()
+            ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO isrc_index (isrc, video_id, source) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+        return len(rows)
+    
+    def get(self, track_info):
+        keys = track_keys(track_info)
+        with self._lock:
+            for key in keys:
+                row = self._conn.execute(
+                    "SELECT video_id FROM matches WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    self._touched[key] = time.time()
+                    if len(self._touched) >= WRITE_BATCH:
+                        self._flush_touches()
+                        self._conn.commit()
+                    self.hits += 1
+                    return row[0]
+            self.misses += 1
+            return None
+    
+    def peek(self, track_info):
+        """Return the cached videoId like get, without counting it or refreshing its LRU position"""
+        with self._lock:
+            for key in track_keys(track_info):
+                row = self._conn.execute("SELECT video_id FROM matches WHERE key = ?", (key,)).fetchone()
+                if row:
+                    return row[0]
+        return None
+    
+    def is_known_miss(self, track_info):
+        """True if the track was searched without a match less than miss_ttl seconds ago"""
+        if not self.miss_ttl:
+            return False
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT checked FROM not_found WHERE key = ?", (track_keys(track_info)[0],)
+            ).fetchone()
+        return bool(row) and time.time() - row[0] < self.miss_ttl
+    
+    def put_miss(self, track_info):
+        """Remember that every search for the track came back without a match"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO not_found (key, checked) VALUES (?, ?)",
+                (track_keys(track_info)[0], time.time())
+            )
+            # Expired misses are dead weight
+            self._conn.execute("DELETE FROM not_found WHERE checked < ?", (time.time() - self.miss_ttl,))
+            self._conn.commit()
+    
+    def put(self, track_info, video_id):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO matches (key, video_id, last_used) VALUES (?, ?, ?)",
+                [(key, video_id, now) for key in track_keys(track_info)]
+            )
+            self._conn.execute("DELETE FROM not_found WHERE key = ?", (track_keys(track_info)[0],))
+            isrc = normalize_isrc(track_info.get('isrc'))
+            if isrc:
+                # Never overrides an imported entry
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO isrc_index (isrc, video_id, source) VALUES (?, ?, 'match')",
+                    (isrc, video_id)
+                )
+            self._puts += 1
+            if self._puts >= WRITE_BATCH:
+                self._puts = 0
+                self._flush_touches()
+                self._evict()
+            self._conn.commit()
+    
+    def invalidate(self, track_info):
+        """Forget the cached match for a single track"""
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM matches WHERE key = ?",
+                [(key,) for key in track_keys(track_info)]
+            )
+            self._conn.execute("DELETE FROM not_found WHERE key = ?", (track_keys(track_info)[0],))
+            isrc = normalize_isrc(track_info.get('isrc'))
+            if isrc:
+                self._conn.execute("DELETE FROM isrc_index WHERE isrc = ?", (isrc,))
+            self._conn.commit()
+    
+    def invalidate_video(self, video_id):
+        """Forget every track that resolved to the given videoId"""
+        with self._lock:
+            self._conn.execute("DELETE FROM matches WHERE video_id = ?", (video_id,))
+            self._conn.execute("DELETE FROM isrc_index WHERE video_id = ?", (video_id,))
+            self._conn.commit()
+    
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM matches")
+            self._conn.execute("DELETE FROM not_found")
+            self._conn.execute("DELETE FROM isrc_index WHERE source = 'match'")
+            self._conn.commit()
+    
+    def _flush_touches(self):
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE matches SET last_used = ? WHERE key = ?",
+                [(last_used, key) for key, last_used in self._touched.items()]
+            )
+            self._touched = {}
+    
+    def _evict(self):
+        if not self.max_entries:
+            return
+        count = self._conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            # Drop the least recently used entries
+            self._conn.execute(
+                "DELETE FROM matches WHERE key IN ("
+                "SELECT key FROM matches ORDER BY last_used ASC LIMIT ?)",
+                (excess,)
+            )
+    
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+    
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+    
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+    
+    def close(self):
+        with self._lock:
+            self._flush_touches()
+            self._evict()
+            self._conn.commit()
+            self._conn.close()
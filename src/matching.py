@@ -0,0 +1,92 @@
+"""Pick the best YouTube Music search result for a Spotify track.
+
+Searches ask for a few candidates at once and score them all locally
+instead of trusting the first hit. When nothing scores high enough, the
+query is simplified step by step (see query_ladder) before giving up.
+"""
+import re
+from difflib import SequenceMatcher
+from match_cache import normalize_text
+
+CANDIDATE_LIMIT = 5
+MIN_SCORE = 0.7
+
+# Versions that are usually a different recording than the one asked for
+VERSION_WORDS = ("live", "remix", "karaoke", "instrumental", "cover", "acoustic", "sped up", "slowed")
+VERSION_PENALTY = 0.3
+
+_FEATURING = re.compile(r"\s*[\(\[]?\s*\b(?:feat|ft|featuring)\b\.?.*$", re.IGNORECASE)
+_VERSION_SUFFIX = re.compile(r"\s+-\s+.*\b(?:remaster(?:ed)?|version|edit|mix|mono|stereo)\b.*$", re.IGNORECASE)
+_BRACKETS = re.compile(r"\s*[\(\[][^\)\]]*[\)\]]")
+
+def simplify_title(title):
+    """Drop featured artists, '- Remastered 2011' style suffixes and bracketed parts"""
+    title = _FEATURING.sub("", title or "")
+    title = _VERSION_SUFFIX.sub("", title)
+    title = _BRACKETS.sub("", title)
+    return " ".join(title.split())
+
+def query_ladder(track_info):
+    """Return the search queries to try for a track, most specific first, without repeats"""
+    title = track_info['title'] or ""
+    artist = track_info['artist'] or ""
+    simple = simplify_title(title) or title
+    queries = []
+    for query in (f"{title} {artist}", f"{simple} {artist}", simple):
+        query = query.strip()
+        if query and query not in queries:
+            queries.append(query)
+    return queries
+
+def similarity(a, b):
+    """0..1 similarity of two strings after normalization; containment counts as a match"""
+    a = normalize_text(a)
+    b = normalize_text(b)
+    if not a or not b:
+        return 0.0
+    if a == b or f" {a} " in f" {b} " or f" {b} " in f" {a} ":
+        return 1.0
+    return SequenceMatcher(None, a, b).ratio()
+
+def _version_words(text):
+    text = f" {normalize_text(text)} "
+    return {word for word in VERSION_WORDS if f" {word} " in text}
+
+def score_candidate(track_info, candidate):
+    """Score one search result against the track; higher is better, about 0..1"""
+    title = candidate.get('title') or ""
+    artists = " ".join(artist.get('name') or "" for artist in candidate.get('artists') or [])
+    album = (candidate.get('album') or {}).get('name') or ""
+    
+    score = 0.45 * similarity(track_info['title'], title)
+    score += 0.3 * similarity(track_info['artist'], artists) if artists else 0.15
+    if track_info.get('album') and album:
+        score += 0.1 * (normalize_text(track_info['album']) == normalize_text(album))
+    
+    duration_ms = track_info.get('duration_ms')
+    if duration_ms and candidate.get('duration_seconds'):
+        # Full marks within 3 seconds, nothing from 30 seconds off
+        delta = abs(duration_ms / 1000 - candidate['duration_seconds'])
+        score += 0.15 * max(0.0, min(1.0, (30 - delta) / 27))
+    else:
+        score += 0.075
+    
+    # A live or remixed result is only right if the Spotify track is one too
+    unwanted = _version_words(title) - _version_words(track_info['title'])
+    if unwanted:
+        score -= VERSION_PENALTY
+    return score
+
+def best_match(track_info, candidates, min_score=MIN_SCORE):
+    """Return (candidate, score) of the best scoring result, or (None, score) below min_score"""
+    best = None
+    best_score = 0.0
+    for candidate in candidates:
+        if not candidate.get('videoId'):
+            continue
+        score = score_candidate(track_info, candidate)
+        if score > best_score:
+            best, best_score = candidate, score
+    if best_score < min_score:
+        return None, best_score
+    return best, best_score
@@ -0,0 +1,188 @@
+"""Counters, gauges and latency histograms for transfers.
+
+The clients and transfer engine report through the small NullMetrics
+interface (inc / set / observe / timer), so any object with those methods
+can be plugged in. MetricsRegistry keeps everything in memory, renders a
+JSON snapshot for run summaries and the Prometheus text format for
+start_http_server.
+"""
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _series(name, labels):
+    if not labels:
+        return name
+    inner = ",".join(f'{key}="{value}"' for key, value in labels)
+    return f"{name}{{{inner}}}"
+
+class NullMetrics:
+    """Metrics interface that records nothing"""
+    
+    def inc(self, name, value=1, **labels):
+        pass
+    
+    def set(self, name, value, **labels):
+        pass
+    
+    def observe(self, name, value, **labels):
+        pass
+    
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the duration of the with-block in seconds"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - started, **labels)
+    
+    def snapshot(self):
+        return {}
+    
+    def reset(self):
+        pass
+
+class Histogram:
+    """Fixed-bucket histogram; quantiles are estimated from bucket upper bounds"""
+    
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+    
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+    
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for idx, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[idx] if idx < len(self.buckets) else float(self.buckets[-1])
+        return float(self.buckets[-1])
+
+class MetricsRegistry(NullMetrics):
+    """Thread-safe in-memory metrics keyed by name and labels"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.gauges = {}
+            self.histograms = {}
+    
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+    
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+    
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+    
+    def snapshot(self):
+        """Return a JSON-friendly dict of every series"""
+        with self._lock:
+            return {
+                'counters': {_series(*key): round(value, 6) for key, value in sorted(self.counters.items())},
+                'gauges': {_series(*key): value for key, value in sorted(self.gauges.items())},
+                'histograms': {
+                    _series(*key): {
+                        'count': histogram.count,
+                        'sum': round(histogram.sum, 6),
+                        'mean': round(histogram.sum / histogram.count, 6) if histogram.count else 0.0,
+                        'p50': histogram.quantile(0.5),
+                        'p95': histogram.quantile(0.95)
+                    }
+                    for key, histogram in sorted(self.histograms.items())
+                }
+            }
+    
+    def to_prometheus(self):
+        """Render every series in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for kind, series in (("counter", self.counters), ("gauge", self.gauges)):
+                typed = set()
+                for (name, labels), value in sorted(series.items()):
+                    if name not in typed:
+                        typed.add(name)
+                        lines.append(f"# TYPE {name} {kind}")
+                    lines.append(f"{_series(name, labels)} {value}")
+            
+            typed = set()
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{_series(name + '_bucket', labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{_series(name + '_sum', labels)} {histogram.sum}")
+                lines.append(f"{_series(name + '_count', labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+def start_http_server(port, registry=REGISTRY, host="127.0.0.1"):
+    """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body = registry.to_prometheus().encode("utf-8")
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            elif self.path == "/metrics.json":
+                body = json.dumps(registry.snapshot(), indent=2).encode("utf-8")
+                content_type = "application/json"
+            else:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            pass  # Suppress server logs
+    
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+def format_breakdown(snapshot):
+    """One line per API method with call count and total time, slowest first"""
+    rows = [
+        (stats['sum'], f"{series}: {stats['count']} calls, {stats['sum']:.1f}s total, p95 {stats['p95']}s")
+        for series, stats in snapshot.get('histograms', {}).items()
+        if series.startswith(("api_request_seconds", "rate_limit_wait_seconds"))
+    ]
+    return [line for _, line in sorted(rows, reverse=True)]
@@ -0,0 +1,43 @@
+import os
+import re
+import sys
+from contextlib import contextmanager
+
+APP_NAME = "SpotifyToYTMusic"
+
+def get_app_data_dir():
+    """Return the per-user data directory, creating it if needed"""
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+        path = os.path.join(base, APP_NAME)
+    elif sys.platform == "darwin":
+        path = os.path.join(os.path.expanduser("~"), "Library", "Application Support", APP_NAME)
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+        path = os.path.join(base, APP_NAME)
+    
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def get_app_data_path(*parts):
+    """Return a path inside the app data directory, creating parent folders"""
+    path = os.path.join(get_app_data_dir(), *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+def safe_filename(value):
+    """Return value with anything unsafe in a file name replaced by '_'"""
+    return re.sub(r"[^\w.-]", "_", str(value))
+
+@contextmanager
+def atomic_write(path):
+    """Write path through a temp file that replaces it only once the block succeeds"""
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            yield f
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, path)
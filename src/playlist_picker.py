@@ -0,0 +1,221 @@
+import re
+import tkinter as tk
+from tkinter import ttk
+
+FILTER_DELAY_MS = 150
+ROW_HEIGHT = 24
+
+class PlaylistPicker(ttk.Frame):
+    """Multi-select playlist list that only creates widgets for the rows on screen.
+    
+    The Treeview holds just the visible window of rows; scrolling and
+    filtering move that window over an in-memory index, so thousands of
+    playlists cost no more to draw than a screenful. The filter matches
+    words against name and owner, and also understands owner:<text>,
+    >N and <N (track count).
+    """
+    
+    def __init__(self, parent, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.entries = []
+        self.search_keys = []
+        self.visible = []
+        self.selected = set()
+        self.offset = 0
+        self.rows = 10
+        self.query = ""
+        self._filter_job = None
+        
+        # Filter box
+        filter_frame = ttk.Frame(self)
+        filter_frame.pack(fill="x", pady=(0, 5))
+        
+        ttk.Label(filter_frame,
+                 text="Filter",
+                 font=('Segoe UI', 10)).pack(side="left", padx=(0, 5))
+        
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *args: self._schedule_filter())
+        ttk.Entry(filter_frame,
+                 textvariable=self.filter_var,
+                 font=('Segoe UI', 10)).pack(side="left", fill="x", expand=True)
+        
+        self.count_label = ttk.Label(filter_frame,
+                                   text="",
+                                   font=('Segoe UI', 9))
+        self.count_label.pack(side="right", padx=(10, 0))
+        
+        # Rows
+        list_frame = ttk.Frame(self)
+        list_frame.pack(fill="both", expand=True)
+        
+        style = ttk.Style()
+        style.configure("Picker.Treeview", rowheight=ROW_HEIGHT, font=('Segoe UI', 10))
+        
+        self.tree = ttk.Treeview(list_frame,
+                                columns=("name", "owner", "tracks"),
+                                show="headings",
+                                selectmode="none",
+                                style="Picker.Treeview")
+        self.tree.heading("name", text="Playlist")
+        self.tree.heading("owner", text="Owner")
+        self.tree.heading("tracks", text="Tracks")
+        self.tree.column("name", width=380)
+        self.tree.column("owner", width=160)
+        self.tree.column("tracks", width=70, anchor="e")
+        self.tree.tag_configure("selected", background='#1DB954', foreground='white')
+        
+        self.scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self._on_scrollbar)
+        
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<Button-1>", self._on_click)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-1, "units"))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(1, "units"))
+    
+    # Data
+    
+    def clear(self):
+        self.entries = []
+        self.search_keys = []
+        self.visible = []
+        self.selected = set()
+        self.offset = 0
+        self._render()
+    
+    def append(self, playlists):
+        """Add a page of playlists, e.g. as they stream in from Spotify"""
+        start = len(self.entries)
+        for playlist in playlists:
+            owner = (playlist.get('owner') or {}).get('display_name') or ""
+            self.entries.append(playlist)
+            self.search_keys.append((f"{playlist['name']} {owner}".lower(), owner.lower(),
+                                     playlist['tracks']['total']))
+        
+        tokens = self._parse(self.query)
+        self.visible.extend(i for i in range(start, len(self.entries)) if self._matches(i, tokens))
+        self._render()
+    
+    def get_selected(self):
+        return [self.entries[i] for i in sorted(self.selected)]
+    
+    # Filtering
+    
+    def _schedule_filter(self):
+        if self._filter_job:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(FILTER_DELAY_MS, self._apply_filter)
+    
+    @staticmethod
+    def _parse(query):
+        tokens = []
+        for word in query.lower().split():
+            match = re.fullmatch(r"([<>])(\d+)", word)
+            if match:
+                tokens.append((match.group(1), int(match.group(2))))
+            elif word.startswith("owner:"):
+                tokens.append(("owner", word[6:]))
+            else:
+                tokens.append(("text", word))
+        return tokens
+    
+    def _matches(self, index, tokens):
+        text, owner, total = self.search_keys[index]
+        for kind, value in tokens:
+            if kind == "text" and value not in text:
+                return False
+            if kind == "owner" and value not in owner:
+                return False
+            if kind == ">" and not total > value:
+                return False
+            if kind == "<" and not total < value:
+                return False
+        return True
+    
+    @staticmethod
+    def _narrows(old, new):
+        """True if every row matching the new tokens also matched the old ones"""
+        if len(new) < len(old):
+            return False
+        for (old_kind, old_value), (new_kind, new_value) in zip(old, new):
+            if old_kind != new_kind:
+                return False
+            if old_kind in ("text", "owner"):
+                if not new_value.startswith(old_value):
+                    return False
+            elif new_value != old_value:
+                return False
+        return True
+    
+    def _apply_filter(self):
+        self._filter_job = None
+        query = self.filter_var.get().strip()
+        tokens = self._parse(query)
+        
+        # Lengthening a text/owner term or adding a term can only narrow the
+        # filter, so rescan just the current matches; anything else rescans everything
+        if self.query and self._narrows(self._parse(self.query), tokens):
+            candidates = self.visible
+        else:
+            candidates = range(len(self.entries))
+        
+        self.query = query
+        self.visible = [i for i in candidates if self._matches(i, tokens)]
+        self.offset = 0
+        self._render()
+    
+    # Rendering
+    
+    def _render(self):
+        self.offset = max(0, min(self.offset, len(self.visible) - self.rows))
+        self.tree.delete(*self.tree.get_children())
+        for index in self.visible[self.offset:self.offset + self.rows]:
+            playlist = self.entries[index]
+            owner = self.search_keys[index][1]
+            self.tree.insert("", "end",
+                            iid=str(index),
+                            values=(playlist['name'], owner, playlist['tracks']['total']),
+                            tags=("selected",) if index in self.selected else ())
+        
+        if self.visible:
+            first = self.offset / len(self.visible)
+            last = min(1.0, (self.offset + self.rows) / len(self.visible))
+        else:
+            first, last = 0.0, 1.0
+        self.scrollbar.set(first, last)
+        
+        self.count_label.config(
+            text=f"{len(self.visible)} of {len(self.entries)} shown, {len(self.selected)} selected"
+        )
+    
+    def scroll(self, amount, what="units"):
+        step = self.rows if what == "pages" else 1
+        self.offset += int(amount) * step
+        self._render()
+    
+    def _on_scrollbar(self, action, amount, what=None):
+        if action == "moveto":
+            self.offset = int(float(amount) * len(self.visible))
+            self._render()
+        else:
+            self.scroll(amount, what)
+    
+    def _on_resize(self, event):
+        rows = max(1, event.height // ROW_HEIGHT - 1)
+        if rows != self.rows:
+            self.rows = rows
+            self._render()
+    
+    def _on_click(self, event):
+        row = self.tree.identify_row(event.y)
+        if not row:
+            return
+        index = int(row)
+        if index in self.selected:
+            self.selected.remove(index)
+        else:
+            self.selected.add(index)
+        self._render()
@@ -0,0 +1,191 @@
+"""Opt-in profiling of transfers.
+
+Enabled with the CLI's --profile option or the SPOTIFY_TO_YTMUSIC_PROFILE
+environment variable (which also covers the GUI):
+
+    cprofile  deterministic profile of the thread driving each playlist
+              (Spotify fetch, waiting on searches, inserts), saved as .pstats
+    sample    wall-clock stack sampling of every thread, including the search
+              workers, saved as a speedscope JSON file (https://speedscope.app)
+
+Files go to the app data profiles/ folder, one per playlist, and a short
+hotspot summary is written to the transfer log.
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from paths import get_app_data_path
+
+PROFILE_ENV = "SPOTIFY_TO_YTMUSIC_PROFILE"
+PROFILE_MODES = ("cprofile", "sample")
+
+class StackSampler(threading.Thread):
+    """Records every other thread's Python stack each interval seconds"""
+    
+    def __init__(self, interval=0.005):
+        super().__init__(name="profiler-sampler", daemon=True)
+        self.interval = interval
+        self.frames = []
+        self.frame_ids = {}
+        self.samples = {}
+        self.thread_names = {}
+        self.started = None
+        self.stopped = None
+        self._stop_event = threading.Event()
+    
+    def _frame_id(self, code):
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        frame_id = self.frame_ids.get(key)
+        if frame_id is None:
+            frame_id = self.frame_ids[key] = len(self.frames)
+            self.frames.append(key)
+        return frame_id
+    
+    def run(self):
+        self.started = last = time.perf_counter()
+        while not self._stop_event.wait(self.interval):
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            for ident, frame in sys._current_frames().items():
+                if ident == self.ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_id(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                if ident not in self.samples:
+                    self.samples[ident] = []
+                    self.thread_names.update((thread.ident, thread.name) for thread in threading.enumerate())
+                self.samples[ident].append((stack, elapsed))
+        self.stopped = time.perf_counter()
+    
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+    
+    def to_speedscope(self, name):
+        """Return the samples as a speedscope file with one profile per thread"""
+        duration = (self.stopped or time.perf_counter()) - (self.started or 0)
+        profiles = []
+        for ident, samples in self.samples.items():
+            profiles.append({
+                'type': "sampled",
+                'name': self.thread_names.get(ident, f"thread {ident}"),
+                'unit': "seconds",
+                'startValue': 0,
+                'endValue': round(duration, 6),
+                'samples': [stack for stack, _ in samples],
+                'weights': [round(elapsed, 6) for _, elapsed in samples]
+            })
+        return {
+            '$schema': "https://www.speedscope.app/file-format-schema.json",
+            'name': name,
+            'exporter': "spotify-to-ytmusic",
+            'shared': {'frames': [
+                {'name': func, 'file': filename, 'line': line} for func, filename, line in self.frames
+            ]},
+            'profiles': profiles
+        }
+    
+    def hotspots(self, top=10):
+        """Return (seconds, share, func, file, line) for the functions with the most self time"""
+        self_time = {}
+        total = 0.0
+        for samples in self.samples.values():
+            for stack, elapsed in samples:
+                if stack:
+                    self_time[stack[-1]] = self_time.get(stack[-1], 0.0) + elapsed
+                    total += elapsed
+        ranked = sorted(self_time.items(), key=lambda item: item[1], reverse=True)[:top]
+        return [
+            (seconds, seconds / total if total else 0.0) + self.frames[frame_id]
+            for frame_id, seconds in ranked
+        ]
+
+class Profiler:
+    """Profiles labelled sections of a run; does nothing when mode is empty"""
+    
+    def __init__(self, mode=None, directory=None, top=10, interval=0.005):
+        mode = mode if mode is not None else os.environ.get(PROFILE_ENV, "")
+        mode = mode.strip().lower()
+        if mode in ("1", "true", "yes"):
+            mode = "cprofile"
+        if mode in ("0", "false", "no"):
+            mode = ""
+        if mode and mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode} (expected one of {', '.join(PROFILE_MODES)})")
+        self.mode = mode
+        self.directory = directory
+        self.top = top
+        self.interval = interval
+        self.run_id = time.strftime("%Y%m%d-%H%M%S")
+        self._count = 0
+        self._lock = threading.Lock()
+    
+    def _output_path(self, label, extension):
+        with self._lock:
+            self._count += 1
+            number = self._count
+        safe_label = re.sub(r"[^\w.-]+", "_", label).strip("_")[:60] or "run"
+        filename = f"{number:03d}-{safe_label}{extension}"
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            return os.path.join(self.directory, filename)
+        return get_app_data_path("profiles", self.run_id, filename)
+    
+    @contextmanager
+    def profile(self, label, on_status=print):
+        if not self.mode:
+            yield
+            return
+        
+        started = time.perf_counter()
+        if self.mode == "cprofile":
+            import cProfile
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as e:
+                # Python 3.12+ allows only one active profiler, e.g. with parallel playlists
+                on_status(f"🔬 Not profiling '{label}': {e}")
+                yield
+                return
+            try:
+                yield
+            finally:
+                profile.disable()
+                self._report_cprofile(profile, label, time.perf_counter() - started, on_status)
+        else:
+            sampler = StackSampler(self.interval)
+            sampler.start()
+            try:
+                yield
+            finally:
+                sampler.stop()
+                self._report_samples(sampler, label, time.perf_counter() - started, on_status)
+    
+    def _report_cprofile(self, profile, label, wall, on_status):
+        path = self._output_path(label, ".pstats")
+        profile.dump_stats(path)
+        import pstats
+        stats = pstats.Stats(profile)
+        ranked = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:self.top]
+        
+        on_status(f"🔬 Profile of '{label}' ({wall:.2f}s wall): {path}")
+        for (filename, line, func), (_, calls, self_time, cumulative, _) in ranked:
+            location = f" ({os.path.basename(filename)}:{line})" if line else ""
+            on_status(f"   {self_time:8.3f}s self {cumulative:8.3f}s cum {calls:>8} calls  {func}{location}")
+    
+    def _report_samples(self, sampler, label, wall, on_status):
+        path = self._output_path(label, ".speedscope.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(sampler.to_speedscope(label), f)
+        
+        on_status(f"🔬 Profile of '{label}' ({wall:.2f}s wall, all threads): {path}")
+        for seconds, share, func, filename, line in sampler.hotspots(self.top):
+            on_status(f"   {seconds:8.3f}s {share:6.1%}  {func} ({os.path.basename(filename)}:{line})")
@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+import time
+from paths import atomic_write, get_app_data_path
+
+WINDOWS = ("hour", "day")
+DEFAULT_SAVE_EVERY = 20
+
+class QuotaExceeded(Exception):
+    """Raised instead of making a request once the current window's budget is spent"""
+    
+    def __init__(self, message, resets_at):
+        super().__init__(message)
+        self.resets_at = resets_at
+
+def window_start(window, now):
+    """Start of the hour, or local midnight, containing now"""
+    if window == "hour":
+        return now - now % 3600
+    local = time.localtime(now)
+    return time.mktime((local.tm_year, local.tm_mon, local.tm_mday, 0, 0, 0, 0, 0, -1))
+
+def next_window_start(window, start):
+    if window == "hour":
+        return start + 3600
+    local = time.localtime(start)
+    # mktime normalizes day 32 and handles DST changes
+    return time.mktime((local.tm_year, local.tm_mon, local.tm_mday + 1, 0, 0, 0, 0, 0, -1))
+
+class QuotaBudget:
+    """A request budget per hour or per day that survives restarts.
+    
+    Every YouTube Music request spends one unit; once limit units are spent,
+    spend raises QuotaExceeded until the next window starts (on the hour, or
+    at local midnight). Usage is written to a small JSON file every save_every
+    requests and when the budget runs out, so a later run continues the same
+    window's count.
+    """
+    
+    def __init__(self, limit, window="day", path=None, save_every=DEFAULT_SAVE_EVERY):
+        if window not in WINDOWS:
+            raise ValueError(f"Unknown quota window: {window}")
+        self.limit = limit
+        self.window = window
+        self.path = path or get_app_data_path("quota.json")
+        self.save_every = save_every
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self.window_start = 0
+        self.used = 0
+        
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('window') == window:
+                self.window_start = state['window_start']
+                self.used = state['used']
+        self._roll(time.time())
+    
+    def _roll(self, now):
+        start = window_start(self.window, now)
+        if start != self.window_start:
+            self.window_start = start
+            self.used = 0
+    
+    def _save(self):
+        state = {'window': self.window, 'window_start': self.window_start, 'used': self.used}
+        with atomic_write(self.path) as f:
+            json.dump(state, f)
+        self._unsaved = 0
+    
+    @property
+    def resets_at(self):
+        return next_window_start(self.window, self.window_start)
+    
+    def remaining(self):
+        with self._lock:
+            self._roll(time.time())
+            return max(0, self.limit - self.used)
+    
+    @property
+    def exhausted(self):
+        return self.remaining() == 0
+    
+    def spend(self, units=1):
+        """Count units against the budget, or raise QuotaExceeded if they don't fit"""
+        with self._lock:
+            self._roll(time.time())
+            if self.used + units > self.limit:
+                self._save()
+                raise QuotaExceeded(
+                    f"Request budget of {self.limit} per {self.window} is spent - "
+                    f"it resets at {time.strftime('%Y-%m-%d %H:%M', time.localtime(self.resets_at))}",
+                    self.resets_at
+                )
+            self.used += units
+            self._unsaved += units
+            if self._unsaved >= self.save_every:
+                self._save()
+    
+    def save(self):
+        with self._lock:
+            self._save()
+    
+    def wait_for_reset(self, on_status=print):
+        """Sleep until the next window starts"""
+        delay = max(0.0, self.resets_at - time.time()) + 1
+        on_status(f"⏸️ Waiting {delay / 60:.0f} minutes for the request budget to reset")
+        time.sleep(delay)
+
+class BudgetProgress:
+    """Which playlists earlier budgeted runs finished or deferred.
+    
+    A transfer's journal is deleted once its playlist completes, so this is
+    what stops the next window's run from transferring it again. Deferred
+    IDs are kept in the order they were scheduled, so interrupted playlists
+    resume first. Delete the file (or pass --reset-progress) to start over.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self.deferred = []
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+            self.done = set(state.get('done', []))
+            self.deferred = state.get('deferred', [])
+    
+    def record(self, results):
+        """Update from a run's summary entries and save"""
+        deferred = []
+        for result in results:
+            if result.get('deferred'):
+                deferred.append(result['id'])
+            elif result['success']:
+                self.done.add(result['id'])
+        # Deferred playlists that didn't run this time keep their place
+        ran = {result['id'] for result in results}
+        self.deferred = deferred + [id for id in self.deferred if id not in ran]
+        self.save()
+    
+    def reset(self):
+        self.done = set()
+        self.deferred = []
+        if os.path.exists(self.path):
+            os.remove(self.path)
+    
+    def save(self):
+        state = {'done': sorted(self.done), 'deferred': self.deferred}
+        with atomic_write(self.path) as f:
+            json.dump(state, f)
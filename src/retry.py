@@ -0,0 +1,223 @@
+import random
+import re
+import threading
+import time
+from metrics import NullMetrics
+
+TRANSIENT_STATUSES = {408, 500, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a service that keeps failing"""
+
+def get_status(error):
+    """Best-effort HTTP status of an exception from spotipy, requests or ytmusicapi"""
+    for attr in ('http_status', 'status_code', 'status'):
+        status = getattr(error, attr, None)
+        if isinstance(status, int):
+            return status
+    response = getattr(error, 'response', None)
+    if isinstance(getattr(response, 'status_code', None), int):
+        return response.status_code
+    # ytmusicapi only puts the status in the message
+    match = re.search(r"HTTP (\d{3})", str(error))
+    return int(match.group(1)) if match else None
+
+def classify_error(error):
+    """Return 'throttled', 'transient' or 'fatal'"""
+    status = get_status(error)
+    if status == 429:
+        return 'throttled'
+    if status in TRANSIENT_STATUSES:
+        return 'transient'
+    if status is None and isinstance(error, (ConnectionError, TimeoutError, OSError)):
+        return 'transient'
+    # requests' exceptions don't subclass the builtin ConnectionError
+    if type(error).__name__ in ('ConnectionError', 'Timeout', 'ReadTimeout', 'ConnectTimeout', 'ChunkedEncodingError'):
+        return 'transient'
+    return 'fatal'
+
+def get_retry_after(error):
+    """Seconds from a Retry-After header on the error, if there is one"""
+    headers = getattr(error, 'headers', None) or getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    try:
+        return max(0.0, float(headers.get('Retry-After')))
+    except (TypeError, ValueError):
+        return None
+
+class CircuitBreaker:
+    """Stops calls for reset_timeout seconds after failure_threshold consecutive failures"""
+    
+    def __init__(self, failure_threshold=8, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+    
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError(
+                    f"Service failing repeatedly - pausing calls for {self.reset_timeout:.0f}s"
+                )
+            # Half-open: let calls through, one more failure reopens
+            self.opened_at = None
+            self.failures = self.failure_threshold - 1
+    
+    def seconds_until_half_open(self):
+        """0 while calls are let through, else how long until the next trial call"""
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+    
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+class AdaptiveController:
+    """AIMD control of request rate and concurrency.
+    
+    Every success adds a little rate and concurrency up to the ceilings; a
+    429 halves both (at most once per cooldown, so a burst of 429s counts
+    once), and slow responses above latency_target trim the rate by 10%.
+    """
+    
+    def __init__(self, rate_limiter, max_concurrency, max_rate=None, min_rate=0.2,
+                 increase=0.05, decrease=0.5, latency_target=2.0, cooldown=1.0):
+        self.rate_limiter = rate_limiter
+        self.rate = rate_limiter.rate
+        self.max_rate = max_rate or self.rate
+        self.min_rate = min_rate
+        self.max_concurrency = max_concurrency
+        self.concurrency = float(max_concurrency)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+        self._last_decrease = 0.0
+        self._active = 0
+        self._cond = threading.Condition()
+    
+    def acquire(self):
+        """Wait for a concurrency slot, then for a rate-limiter token"""
+        with self._cond:
+            while self._active >= max(1, int(self.concurrency)):
+                self._cond.wait()
+            self._active += 1
+        self.rate_limiter.acquire()
+    
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+    
+    def on_success(self, latency):
+        with self._cond:
+            if latency > self.latency_target:
+                self.rate = max(self.min_rate, self.rate * 0.9)
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+            self.rate_limiter.set_rate(self.rate)
+            self._cond.notify_all()
+    
+    def on_throttle(self):
+        with self._cond:
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.concurrency = max(1.0, self.concurrency * self.decrease)
+            self.rate_limiter.set_rate(self.rate)
+
+class RetryPolicy:
+    """Retries throttled and transient failures with exponential backoff and full jitter.
+    
+    Each attempt first spends one unit from budget, if given, so running out
+    of a local budget raises before any token is taken or error counted.
+    A Retry-After from the server is honoured in full; one longer than
+    max_retry_after fails the call instead of stalling a worker for it.
+    Each attempt's latency, the time spent waiting for the controller, errors,
+    retries and backoff sleep are reported to metrics under the service label.
+    """
+    
+    def __init__(self, controller, breaker=None, max_attempts=5, base_delay=0.5, max_delay=30.0,
+                 max_retry_after=300.0, metrics=None, service="api", budget=None):
+        self.controller = controller
+        self.metrics = metrics or NullMetrics()
+        self.service = service
+        self.breaker = breaker or CircuitBreaker()
+        # Anything with spend(), e.g. a QuotaBudget; it raises before a request is made
+        self.budget = budget
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.retries = 0
+        self.throttled = 0
+    
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+    
+    def call(self, fn, *args, **kwargs):
+        method = getattr(fn, '__name__', 'call')
+        attempt = 0
+        while True:
+            attempt += 1
+            self.breaker.before_call()
+            if self.budget is not None:
+                self.budget.spend()
+            waited = time.monotonic()
+            self.controller.acquire()
+            started = time.monotonic()
+            self.metrics.observe("rate_limit_wait_seconds", started - waited, service=self.service)
+            try:
+                result = fn(*args, **kwargs)
+                error = None
+            except Exception as e:
+                error = e
+            finally:
+                self.controller.release()
+            latency = time.monotonic() - started
+            self.metrics.observe("api_request_seconds", latency, service=self.service, method=method)
+            
+            if error is None:
+                self.breaker.record_success()
+                self.controller.on_success(latency)
+                return result
+            
+            kind = classify_error(error)
+            self.metrics.inc("api_errors_total", service=self.service, kind=kind)
+            if kind == 'fatal':
+                raise error
+            
+            self.breaker.record_failure()
+            if kind == 'throttled':
+                self.throttled += 1
+                self.controller.on_throttle()
+            if attempt >= self.max_attempts:
+                raise error
+            
+            delay = self.backoff(attempt)
+            retry_after = get_retry_after(error)
+            if retry_after is not None:
+                # Retrying sooner than the server asked only earns another 429
+                if retry_after > self.max_retry_after:
+                    raise error
+                delay = max(delay, retry_after)
+            self.retries += 1
+            self.metrics.inc("api_retries_total", service=self.service)
+            self.metrics.inc("backoff_sleep_seconds_total", delay, service=self.service)
+            time.sleep(delay)
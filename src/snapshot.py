@@ -0,0 +1,105 @@
+"""Offline snapshots of Spotify playlists.
+
+A snapshot is a JSON Lines file: a header, then for each playlist one
+object line followed by one compact array line per track:
+
+    {"type": "snapshot", "version": 1, "created": 1700000000.0}
+    {"type": "playlist", "id": "...", "name": "...", "snapshot_id": "...", "owner": "...", "total": 2}
+    ["<track id>", "<title>", "<artist>", "<album>", "<isrc>", <duration ms>]
+    ["<track id>", "<title>", "<artist>", "<album>", "<isrc>", <duration ms>]
+
+SnapshotReader serves it through the same methods transfers use on
+SpotifyClient, reading each playlist's tracks lazily from its byte offset,
+so a snapshot can be pushed any number of times without Spotify credentials.
+"""
+import json
+import time
+from paths import atomic_write
+from track import Track
+
+SNAPSHOT_VERSION = 1
+
+def write_snapshot(path, spotify_client, playlists, on_status=print):
+    """Stream the tracks of playlists from Spotify into a snapshot file; returns the track count"""
+    total = 0
+    # Written under a temporary name so a failed export never leaves a partial snapshot
+    with atomic_write(path) as f:
+        f.write(json.dumps({'type': "snapshot", 'version': SNAPSHOT_VERSION, 'created': time.time()}) + "\n")
+        for playlist in playlists:
+            f.write(json.dumps({
+                'type': "playlist",
+                'id': playlist['id'],
+                'name': playlist['name'],
+                'snapshot_id': playlist.get('snapshot_id'),
+                'owner': (playlist.get('owner') or {}).get('display_name'),
+                'total': playlist['tracks']['total']
+            }, ensure_ascii=False) + "\n")
+            count = 0
+            for track in spotify_client.iter_playlist_tracks(playlist['id']):
+                f.write(json.dumps([track['id'], track['title'], track['artist'], track['album'],
+                                    track.get('isrc'), track.get('duration_ms')], ensure_ascii=False) + "\n")
+                count += 1
+            total += count
+            on_status(f"📦 Exported '{playlist['name']}' ({count} tracks)")
+    return total
+
+class SnapshotReader:
+    """Read-only, SpotifyClient-compatible view of a snapshot file"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.offsets = {}
+        self.playlists = []
+        self._index()
+    
+    def _index(self):
+        """Find each playlist line and count its tracks without parsing them"""
+        with open(self.path, 'rb') as f:
+            header = json.loads(f.readline() or b"{}")
+            if header.get('type') != "snapshot":
+                raise Exception(f"{self.path} is not a playlist snapshot")
+            if header.get('version', 0) > SNAPSHOT_VERSION:
+                raise Exception(f"{self.path} was written by a newer version (snapshot format {header['version']})")
+            
+            playlist = None
+            offset = f.tell()
+            for line in f:
+                offset += len(line)
+                if line.startswith(b"{"):
+                    record = json.loads(line)
+                    playlist = {
+                        'id': record['id'],
+                        'name': record['name'],
+                        'snapshot_id': record.get('snapshot_id'),
+                        'owner': {'display_name': record.get('owner')},
+                        'tracks': {'total': 0}
+                    }
+                    self.playlists.append(playlist)
+                    self.offsets[record['id']] = offset
+                elif playlist is not None and line.strip():
+                    playlist['tracks']['total'] += 1
+    
+    def authenticate(self):
+        pass
+    
+    def get_playlists(self):
+        return list(self.playlists)
+    
+    def iter_playlist_pages(self):
+        yield self.get_playlists()
+    
+    def get_playlist_tracks(self, playlist_id):
+        return list(self.iter_playlist_tracks(playlist_id))
+    
+    def iter_playlist_tracks(self, playlist_id):
+        """Yield Tracks of one playlist, reading from its offset up to the next playlist"""
+        if playlist_id not in self.offsets:
+            raise Exception(f"Playlist {playlist_id} is not in snapshot {self.path}")
+        # A handle per call, so parallel playlist transfers don't share a file position
+        with open(self.path, 'rb') as f:
+            f.seek(self.offsets[playlist_id])
+            for line in f:
+                if line.startswith(b"{"):
+                    break
+                if line.strip():
+                    yield Track(*json.loads(line))
@@ -1,46 +1,102 @@
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from metrics import REGISTRY
+from track import Track, compact_playlist
+
+# Only request the attributes the transfer actually uses
+TRACK_FIELDS = "items(track(id,name,artists(name),album(name),external_ids(isrc),duration_ms)),total"
+TRACK_PAGE_SIZE = 100
+PLAYLIST_PAGE_SIZE = 50
 
 class SpotifyClient:
-    def __init__(self, client_id, client_secret):
+    def __init__(self, client_id, client_secret, max_workers=4, metrics=None, session=None):
         self.client_id = client_id
         self.client_secret = client_secret
         self.redirect_uri = "http://127.0.0.1:8888/callback"
         self.sp = None
+        self.max_workers = max_workers
+        self.metrics = metrics or REGISTRY
+        self.session = session
     
     def authenticate(self):
+        # spotipy pulls in requests and friends, so load it only when connecting
+        import spotipy
+        from spotipy.oauth2 import SpotifyOAuth
+        from http_session import create_spotify_session
+        
+        # One pooled keep-alive session for the API and token calls, sized for
+        # the parallel page fetches of several playlists at once
+        if self.session is None:
+            self.session = create_spotify_session(pool_size=self.max_workers * 4)
+        
         self.sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
             client_id=self.client_id,
             client_secret=self.client_secret,
             redirect_uri=self.redirect_uri,
-            scope="playlist-read-private"
-        ))
+            scope="playlist-read-private",
+            requests_session=self.session
+        ), requests_session=self.session)
+    
+    def _iter_pages(self, fetch_page, page_size, method):
+        """Yield result pages in order, fetching every page after the first in parallel.
+        
+        The first page reports the total, so the remaining offsets are known up
+        front; at most max_workers * 2 of them are in flight at once.
+        """
+        def timed_fetch(offset):
+            with self.metrics.timer("api_request_seconds", service="spotify", method=method):
+                return fetch_page(offset)
+        
+        first = timed_fetch(0)
+        yield first
+        
+        offsets = range(page_size, first['total'], page_size)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = deque()
+            for offset in offsets:
+                pending.append(executor.submit(timed_fetch, offset))
+                if len(pending) >= self.max_workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
     
     def get_playlists(self):
+        playlists = []
+        for page in self.iter_playlist_pages():
+            playlists.extend(page)
+        return playlists
+    
+    def iter_playlist_pages(self):
+        """Yield the user's playlists one page (list) at a time, trimmed to the fields the app uses"""
         if not self.sp:
             raise Exception("Not authenticated")
         
-        playlists = []
-        results = self.sp.current_user_playlists()
-        while results:
-            playlists.extend(results['items'])
-            results = self.sp.next(results) if results['next'] else None
-        return playlists
+        pages = self._iter_pages(
+            lambda offset: self.sp.current_user_playlists(limit=PLAYLIST_PAGE_SIZE, offset=offset),
+            PLAYLIST_PAGE_SIZE,
+            "current_user_playlists"
+        )
+        for results in pages:
+            yield [compact_playlist(item) for item in results['items']]
     
     def get_playlist_tracks(self, playlist_id):
+        return list(self.iter_playlist_tracks(playlist_id))
+    
+    def iter_playlist_tracks(self, playlist_id):
+        """Yield Tracks as each page arrives instead of loading the whole playlist"""
         if not self.sp:
             raise Exception("Not authenticated")
         
-        tracks = []
-        results = self.sp.playlist_tracks(playlist_id)
-        while results:
+        pages = self._iter_pages(
+            lambda offset: self.sp.playlist_tracks(
+                playlist_id, fields=TRACK_FIELDS, limit=TRACK_PAGE_SIZE, offset=offset
+            ),
+            TRACK_PAGE_SIZE,
+            "playlist_tracks"
+        )
+        for results in pages:
             for item in results['items']:
                 track = item['track']
                 if track and track['id']:
-                    tracks.append({
-                        'title': track['name'],
-                        'artist': track['artists'][0]['name'],
-                        'album': track['album']['name']
-                    })
-            results = self.sp.next(results) if results['next'] else None
-        return tracks
\ No newline at end of file
+                    yield Track(track['id'], track['name'], track['artists'][0]['name'], track['album']['name'],
+                                (track.get('external_ids') or {}).get('isrc'), track.get('duration_ms'))
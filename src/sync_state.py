@@ -0,0 +1,39 @@
+import json
+import os
+from paths import atomic_write, get_app_data_path, safe_filename
+
+class SyncState:
+    """Remembers, per Spotify playlist, what the last sync produced.
+    
+    Each playlist gets a small JSON file holding the Spotify snapshot_id,
+    the YouTube playlist ID and the ordered [track_key, video_id] pairs,
+    which is what the next sync diffs against.
+    """
+    
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.dirname(get_app_data_path("sync", "state.json"))
+        os.makedirs(self.directory, exist_ok=True)
+    
+    def _path(self, playlist_id):
+        return os.path.join(self.directory, f"{safe_filename(playlist_id)}.json")
+    
+    def load(self, playlist_id):
+        path = self._path(playlist_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    
+    def save(self, playlist_id, snapshot_id, youtube_playlist_id, tracks):
+        state = {
+            'snapshot_id': snapshot_id,
+            'youtube_playlist_id': youtube_playlist_id,
+            'tracks': tracks
+        }
+        with atomic_write(self._path(playlist_id)) as f:
+            json.dump(state, f)
+    
+    def forget(self, playlist_id):
+        path = self._path(playlist_id)
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,65 @@
+import sys
+
+def intern(value):
+    """sys.intern for names that repeat across a library; None stays None"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+class Track:
+    """Compact record for one Spotify track.
+    
+    Slots instead of a per-track dict, and interned artist and album names
+    (which repeat across a library), keep 100k-track playlists small. It
+    also reads like the dicts it replaced: track['title'], track.get('album')
+    and dict(track) all work. isrc and duration_ms are None when Spotify
+    doesn't report them.
+    """
+    
+    __slots__ = ('id', 'title', 'artist', 'album', 'isrc', 'duration_ms')
+    
+    def __init__(self, id, title, artist, album, isrc=None, duration_ms=None):
+        self.id = id
+        self.title = title
+        self.artist = intern(artist)
+        self.album = intern(album)
+        self.isrc = isrc
+        self.duration_ms = duration_ms
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(*(data.get(field) for field in cls.__slots__))
+    
+    def keys(self):
+        return self.__slots__
+    
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __contains__(self, key):
+        return key in self.__slots__
+    
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+    
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+    
+    def __eq__(self, other):
+        if not isinstance(other, Track):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+    
+    def __repr__(self):
+        return f"Track({self.id!r}, {self.title!r}, {self.artist!r}, {self.album!r}, {self.isrc!r}, {self.duration_ms!r})"
+
+def compact_playlist(item):
+    """Keep only the playlist fields the app uses from a Spotify API playlist object"""
+    owner = item.get('owner') or {}
+    return {
+        'id': item['id'],
+        'name': item['name'],
+        'snapshot_id': item.get('snapshot_id'),
+        'owner': {'display_name': intern(owner.get('display_name'))},
+        'tracks': {'total': (item.get('tracks') or {}).get('total', 0)}
+    }
@@ -0,0 +1,699 @@
+import math
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from match_cache import track_keys
+from matching import query_ladder
+from metrics import format_breakdown
+from profiling import Profiler
+from quota import QuotaExceeded
+from retry import CircuitOpenError
+from sync_state import SyncState
+
+ORDERS = ("given", "smallest-first", "largest-first")
+# How many times a playlist waits out an open circuit breaker before it is failed
+BREAKER_PAUSES = 3
+
+def select_playlists(playlists, selectors=(), pattern=None):
+    """Pick playlists whose name or ID is in selectors, or whose name matches pattern"""
+    wanted = set(selectors)
+    regex = re.compile(pattern, re.IGNORECASE) if pattern else None
+    return [
+        playlist for playlist in playlists
+        if playlist['id'] in wanted
+        or playlist['name'] in wanted
+        or (regex and regex.search(playlist['name']))
+    ]
+
+def shard_playlists(playlists, index, count):
+    """Return the playlists of shard index (1-based) out of count.
+    
+    Playlists are dealt largest first to the shard with the fewest tracks, so
+    shards get similar amounts of work. The split depends only on the input,
+    so machines given the same selection agree on it.
+    """
+    if not 1 <= index <= count:
+        raise ValueError(f"Shard {index}/{count} is out of range")
+    loads = [0] * count
+    shards = [[] for _ in range(count)]
+    by_size = sorted(enumerate(playlists), key=lambda item: item[1]['tracks']['total'], reverse=True)
+    for position, playlist in by_size:
+        shard = loads.index(min(loads))
+        loads[shard] += playlist['tracks']['total']
+        shards[shard].append((position, playlist))
+    return [playlist for _, playlist in sorted(shards[index - 1], key=lambda item: item[0])]
+
+def plan_shared_matches(spotify_client, youtube_client, playlists, on_status=print, on_progress=None):
+    """Fetch every playlist and search each unique track exactly once.
+    
+    Returns (playlist_tracks, resolved, searches_saved) where playlist_tracks
+    maps playlist ID to its tracks and resolved maps track key to videoId.
+    searches_saved only counts repeats of tracks that actually needed a search.
+    """
+    on_status("\n🧭 Planning transfer across selected playlists")
+    if on_progress:
+        on_progress(0, "Fetching selected playlists...")
+    
+    playlist_tracks = {}
+    unique_tracks = {}
+    occurrences = Counter()
+    for playlist in playlists:
+        tracks = spotify_client.get_playlist_tracks(playlist['id'])
+        playlist_tracks[playlist['id']] = tracks
+        for track in tracks:
+            key = track_keys(track)[0]
+            unique_tracks.setdefault(key, track)
+            occurrences[key] += 1
+    
+    total_tracks = sum(len(tracks) for tracks in playlist_tracks.values())
+    on_status(f"📋 {total_tracks} tracks, {len(unique_tracks)} unique")
+    
+    if on_progress:
+        on_progress(0, f"Matching {len(unique_tracks)} unique tracks...")
+    
+    def progress_callback(current, total, status):
+        if on_progress:
+            on_progress(current / total * 100, None)
+        if "Matched" not in status:
+            on_status(f"⚠️ {status}")
+    
+    resolved, sources = youtube_client.resolve_tracks(list(unique_tracks.values()), progress_callback)
+    counts = Counter(sources.values())
+    # A repeat of a cached track wouldn't have been searched anyway
+    saved = sum(occurrences[key] - 1 for key, source in sources.items() if source == 'search')
+    on_status(f"💾 Shared pass: {counts['isrc'] + counts['cache']} hits ({counts['isrc']} by ISRC), "
+              f"{counts['search']} misses - {saved} duplicate searches saved")
+    return playlist_tracks, resolved, saved
+
+def format_duration(seconds):
+    """Render seconds as e.g. '2h 05m', '12m 30s' or '45s'"""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {seconds:02d}s"
+    return f"{seconds}s"
+
+def plan_transfer(spotify_client, youtube_client, playlists, on_status=print, on_progress=None):
+    """Estimate what transferring playlists would cost, without touching YouTube Music.
+    
+    Fetches the playlists from Spotify, dedupes their tracks and checks each
+    against the local ISRC index, match cache and known misses; nothing is
+    searched, created or inserted. Returns a summary dict with the searches,
+    API calls and insert batches needed and a (min, max) time estimate: the
+    min assumes every search hits on its first query at the client's maximum
+    request rate, the max that misses walk the whole query ladder at the
+    starting rate.
+    """
+    started = time.time()
+    cache = youtube_client.cache
+    chunk_size = youtube_client.insert_chunk_size
+    on_status(f"\n🧮 Planning {len(playlists)} playlists (dry run - nothing is written to YouTube Music)")
+    
+    summary = {'mode': 'plan', 'playlists': []}
+    totals = Counter()
+    seen = set()
+    search_calls_max = 0
+    for idx, playlist in enumerate(playlists):
+        if on_progress:
+            on_progress(idx / len(playlists) * 100, f"Checking {playlist['name']}...")
+        tracks = spotify_client.get_playlist_tracks(playlist['id'])
+        counts = Counter()
+        for track in tracks:
+            key = track_keys(track)[0]
+            if key in seen:
+                # Resolved once for the whole selection
+                counts['shared'] += 1
+                continue
+            seen.add(key)
+            if cache.get_isrc(track.get('isrc')):
+                counts['isrc'] += 1
+            elif cache.peek(track):
+                counts['cached'] += 1
+            elif cache.is_known_miss(track):
+                counts['known_misses'] += 1
+            else:
+                counts['to_search'] += 1
+                search_calls_max += len(query_ladder(track))
+        
+        # Every track not known to be missing may end up inserted
+        batches = math.ceil((len(tracks) - counts['known_misses']) / chunk_size)
+        totals.update(counts)
+        totals['tracks'] += len(tracks)
+        totals['insert_batches'] += batches
+        summary['playlists'].append({
+            'id': playlist['id'],
+            'name': playlist['name'],
+            'tracks': len(tracks),
+            'isrc': counts['isrc'],
+            'cached': counts['cached'],
+            'known_misses': counts['known_misses'],
+            'shared': counts['shared'],
+            'to_search': counts['to_search'],
+            'insert_batches': batches
+        })
+    
+    fetch_seconds = time.time() - started
+    writes = len(playlists) + totals['insert_batches']
+    api_calls = {'min': totals['to_search'] + writes, 'max': search_calls_max + writes}
+    rate = youtube_client.controller.rate
+    max_rate = youtube_client.controller.max_rate
+    estimated = {
+        'min': round(fetch_seconds + api_calls['min'] / max_rate, 1),
+        'max': round(fetch_seconds + api_calls['max'] / rate, 1)
+    }
+    summary.update(
+        tracks=totals['tracks'],
+        unique_tracks=len(seen),
+        isrc=totals['isrc'],
+        cached=totals['cached'],
+        known_misses=totals['known_misses'],
+        to_search=totals['to_search'],
+        search_calls={'min': totals['to_search'], 'max': search_calls_max},
+        insert_batches=totals['insert_batches'],
+        api_calls=api_calls,
+        requests_per_second={'start': rate, 'max': max_rate},
+        fetch_seconds=round(fetch_seconds, 3),
+        estimated_seconds=estimated
+    )
+    
+    on_status(f"📋 {summary['tracks']} tracks, {summary['unique_tracks']} unique")
+    on_status(f"💾 Known locally: {summary['isrc']} by ISRC, {summary['cached']} cached, "
+              f"{summary['known_misses']} known misses")
+    on_status(f"🔎 To search: {summary['to_search']} tracks "
+              f"({api_calls['min'] - writes}-{search_calls_max} search calls)")
+    on_status(f"➕ Writes: {len(playlists)} playlists to create, {summary['insert_batches']} insert batches")
+    on_status(f"⏳ About {format_duration(estimated['min'])} - {format_duration(estimated['max'])} "
+              f"at {rate:g}-{max_rate:g} requests/s ({api_calls['min']}-{api_calls['max']} YouTube API calls)")
+    quota = youtube_client.quota
+    if quota:
+        # Windows needed, counting what is left of the current one
+        summary['budget_windows'] = {
+            'min': 1 + max(0, math.ceil((api_calls['min'] - quota.remaining()) / quota.limit)),
+            'max': 1 + max(0, math.ceil((api_calls['max'] - quota.remaining()) / quota.limit))
+        }
+        on_status(f"📆 Budget: {quota.remaining()} of {quota.limit} requests left this {quota.window} - "
+                  f"{summary['budget_windows']['min']}-{summary['budget_windows']['max']} {quota.window}s to finish")
+    if on_progress:
+        on_progress(100, "Plan ready")
+    return summary
+
+def order_playlists(playlists, order="given", pinned=()):
+    """Return playlists in scheduling order.
+    
+    smallest-first finishes the most playlists early; largest-first starts the
+    long ones first, which gives the shortest total time when run in parallel.
+    Playlists named (by name or ID) in pinned go first, in pinned order, so
+    they are done before a request budget runs out.
+    """
+    if order == "smallest-first":
+        ordered = sorted(playlists, key=lambda playlist: playlist['tracks']['total'])
+    elif order == "largest-first":
+        ordered = sorted(playlists, key=lambda playlist: playlist['tracks']['total'], reverse=True)
+    elif order in ORDERS:
+        ordered = list(playlists)
+    else:
+        raise ValueError(f"Unknown playlist order: {order}")
+    
+    pins = list(pinned)
+    def pin_rank(playlist):
+        for rank, pin in enumerate(pins):
+            if pin in (playlist['id'], playlist['name']):
+                return rank
+        return len(pins)
+    # sorted is stable, so unpinned playlists keep the order above
+    return sorted(ordered, key=pin_rank) if pins else ordered
+
+def deferred_result(playlist, resets_at):
+    """Summary entry of a playlist left for the next quota window"""
+    return {
+        'id': playlist['id'],
+        'name': playlist['name'],
+        'tracks': playlist['tracks']['total'],
+        'transferred': 0,
+        'success': False,
+        'deferred': True,
+        'status': 'deferred',
+        'resumes_at': resets_at
+    }
+
+def wait_for_breaker(youtube_client, on_status=print):
+    """Sleep until YouTube Music's circuit breaker lets a trial call through; False if it isn't open"""
+    delay = youtube_client.retry.breaker.seconds_until_half_open()
+    if not delay:
+        return False
+    on_status(f"⏸️ YouTube Music keeps failing - pausing {delay:.0f}s before trying again")
+    time.sleep(delay)
+    return True
+
+def call_with_breaker_pauses(youtube_client, on_status, fn, *args):
+    """Call fn, waiting out an open circuit breaker up to BREAKER_PAUSES times"""
+    for _ in range(BREAKER_PAUSES):
+        try:
+            return fn(*args)
+        except CircuitOpenError:
+            wait_for_breaker(youtube_client, on_status)
+    return fn(*args)
+
+def failed_result(playlist, error):
+    """Summary entry of a playlist that couldn't be started, e.g. while YouTube Music keeps failing"""
+    return {
+        'id': playlist['id'],
+        'name': playlist['name'],
+        'tracks': playlist['tracks']['total'],
+        'transferred': 0,
+        'success': False,
+        'status': 'failed',
+        'error': str(error)
+    }
+
+def run_transfer(spotify_client, youtube_client, playlists, on_status=print, on_progress=None, on_track=None,
+                 max_parallel=1, order="given", dedupe=True, metrics=None, profile=None, pinned=(),
+                 verify=False):
+    """Transfer playlists and return a summary dict with per-playlist counts and timings.
+    
+    on_status receives log lines, on_progress(percent, label) overall progress
+    (label is None when unchanged) and on_track per-track status lines.
+    Up to max_parallel playlists run at once; they all share the YouTube
+    client's rate limiter, so the request budget stays global. With dedupe,
+    tracks shared by several playlists are resolved once up front. Counters
+    and timings go to metrics (the YouTube client's by default) and a
+    snapshot of it is included in the summary. profile ('cprofile' or
+    'sample', default from the environment) profiles each playlist.
+    
+    With a quota on the YouTube client, no playlist is started once the
+    budget is spent; unfinished ones are marked deferred and resume from
+    their journal on the next run. pinned playlists are scheduled first.
+    When YouTube Music's circuit breaker opens, the transfer waits for it to
+    half-open and resumes, up to BREAKER_PAUSES times per playlist. With
+    verify, each transferred playlist is read back and anything missing is
+    re-added (see verify_result).
+    """
+    metrics = metrics or youtube_client.metrics
+    profiler = Profiler(profile)
+    quota = youtube_client.quota
+    started = time.time()
+    playlists = order_playlists(playlists, order, pinned)
+    total_playlists = len(playlists)
+    summary = {'playlists': [None] * total_playlists, 'searches_saved': 0}
+    
+    playlist_tracks, resolved = {}, None
+    if dedupe and total_playlists > 1:
+        try:
+            with profiler.profile("shared matches", on_status):
+                playlist_tracks, resolved, summary['searches_saved'] = call_with_breaker_pauses(
+                    youtube_client, on_status, plan_shared_matches,
+                    spotify_client, youtube_client, playlists, on_status, on_progress
+                )
+        except QuotaExceeded as e:
+            # Searches done so far are in the match cache, so the next window picks up from there
+            on_status(f"⏸️ {e}")
+            summary['playlists'] = [deferred_result(playlist, e.resets_at) for playlist in playlists]
+            return finish_summary(summary, started, metrics, on_status)
+        except CircuitOpenError as e:
+            # Still failing after every pause; searches done so far are cached for a rerun
+            on_status(f"❌ Transfer stopped: {e}")
+            summary['playlists'] = [failed_result(playlist, e) for playlist in playlists]
+            return finish_summary(summary, started, metrics, on_status)
+    
+    lock = threading.Lock()
+    fractions = {}
+    finished = 0
+    
+    def report_progress():
+        if not on_progress:
+            return
+        with lock:
+            overall = (finished + sum(fraction for _, fraction in fractions.values())) * 100 / total_playlists
+            running = ", ".join(f"{name} {fraction:.0%}" for name, fraction in fractions.values())
+        label = f"{finished} of {total_playlists} playlists done"
+        if running:
+            label += f" - {running}"
+        on_progress(overall, label)
+    
+    def transfer_one(idx, playlist):
+        nonlocal finished
+        name = playlist['name']
+        prefix = f"[{name}] " if max_parallel > 1 else ""
+        playlist_started = time.time()
+        
+        if quota and quota.exhausted:
+            on_status(f"⏸️ Deferred '{name}' - request budget spent")
+            summary['playlists'][idx] = deferred_result(playlist, quota.resets_at)
+            return
+        
+        on_status(f"\n🎵 Transferring: {name}")
+        with lock:
+            fractions[idx] = (name, 0.0)
+        report_progress()
+        
+        if playlist['id'] in playlist_tracks:
+            track_total = len(playlist_tracks[playlist['id']])
+        else:
+            track_total = playlist['tracks']['total']
+        on_status(f"📋 Found {track_total} tracks in '{name}'")
+        
+        # Positions rather than counts, since a retried attempt reports tracks after the last chunk again
+        not_found = set()
+        failed = set()
+        
+        def progress_callback(current, total, status):
+            with lock:
+                fractions[idx] = (name, current / total)
+            report_progress()
+            
+            not_found.discard(current)
+            failed.discard(current)
+            if "Added" in status:
+                metrics.inc("tracks_total", result="added")
+                line = f"{prefix}✓ {status}"
+            elif status.startswith("Failed"):
+                failed.add(current)
+                metrics.inc("tracks_total", result="failed")
+                line = f"{prefix}❌ {status}"
+            else:
+                not_found.add(current)
+                metrics.inc("tracks_total", result="not_found")
+                line = f"{prefix}⚠️ {status}"
+            if on_track:
+                on_track(line)
+        
+        cache = Counter()
+        video_ids = [] if verify else None
+        for attempt in range(BREAKER_PAUSES + 1):
+            if playlist['id'] in playlist_tracks:
+                tracks = playlist_tracks[playlist['id']]
+            else:
+                # Stream tracks so searching overlaps with fetching later pages
+                tracks = spotify_client.iter_playlist_tracks(playlist['id'])
+            # Spotify pages are fetched lazily inside this call, so it covers the fetch too
+            with profiler.profile(name, on_status):
+                transfer = youtube_client.create_playlist_and_add_tracks(
+                    name, tracks, progress_callback, total=track_total, transfer_id=playlist['id'],
+                    resolved=resolved, keep_video_ids=verify
+                )
+            cache.update(hits=transfer.hits, isrc=transfer.isrc, misses=transfer.misses, shared=transfer.shared)
+            if verify:
+                video_ids.extend(transfer.video_ids)
+            # A tripped breaker is a bad patch, not a bad playlist: wait it out and resume from the journal
+            if not transfer.error or attempt == BREAKER_PAUSES or not wait_for_breaker(youtube_client, on_status):
+                break
+            on_status(f"{prefix}🔁 Resuming '{name}' after the last saved chunk")
+        success = transfer.success
+        
+        on_status(f"{prefix}💾 Match cache: {cache['hits']} hits ({cache['isrc']} by ISRC), "
+                  f"{cache['misses']} misses, {cache['shared']} from the shared pass")
+        
+        if not success and quota and quota.exhausted:
+            # The journal holds the progress, so the next window resumes mid-playlist
+            on_status(f"⏸️ Paused '{name}' - request budget spent; it resumes from the last saved chunk\n")
+            with lock:
+                fractions.pop(idx, None)
+            summary['playlists'][idx] = deferred_result(playlist, quota.resets_at)
+            return
+        
+        check = None
+        if success and verify:
+            check = verify_result(youtube_client, transfer.playlist_id, video_ids, name, on_status)
+        
+        if success:
+            on_status(f"✅ Successfully transferred '{name}' ({transfer.added}/{track_total} tracks)\n")
+        else:
+            on_status(f"❌ Failed to transfer '{name}'\n")
+        
+        with lock:
+            fractions.pop(idx, None)
+            finished += 1
+        report_progress()
+        
+        metrics.inc("playlists_total", result="success" if success else "failed")
+        metrics.observe("playlist_transfer_seconds", time.time() - playlist_started)
+        summary['playlists'][idx] = {
+            'id': playlist['id'],
+            'name': name,
+            'tracks': track_total,
+            'transferred': transfer.added,
+            'not_found': len(not_found),
+            'failed': len(failed),
+            'success': success,
+            'cache_hits': cache['hits'],
+            'isrc_hits': cache['isrc'],
+            'cache_misses': cache['misses'],
+            'shared_hits': cache['shared'],
+            'seconds': round(time.time() - playlist_started, 3)
+        }
+        if check:
+            summary['playlists'][idx]['verify'] = check
+    
+    with ThreadPoolExecutor(max_workers=max(1, max_parallel)) as executor:
+        futures = [executor.submit(transfer_one, idx, playlist) for idx, playlist in enumerate(playlists)]
+        for future in futures:
+            future.result()
+    
+    return finish_summary(summary, started, metrics, on_status)
+
+def verify_result(youtube_client, playlist_id, video_ids, name, on_status=print):
+    """Run verify_playlist and log the outcome; a failed check is reported, not raised"""
+    try:
+        check = youtube_client.verify_playlist(playlist_id, video_ids)
+    except Exception as e:
+        on_status(f"⚠️ Couldn't verify '{name}': {e}")
+        return {'error': str(e)}
+    if check['readded']:
+        on_status(f"🔍 '{name}' was missing {check['readded']} of {check['expected']} tracks - re-added them")
+    else:
+        on_status(f"🔍 Verified '{name}': all {check['expected']} tracks present")
+    return check
+
+def finish_summary(summary, started, metrics, on_status=print):
+    """Add totals, throughput and the metrics snapshot to a run summary"""
+    summary['seconds'] = round(time.time() - started, 3)
+    summary['success'] = all(p['success'] for p in summary['playlists'])
+    deferred = [p for p in summary['playlists'] if p.get('deferred')]
+    if deferred:
+        summary['deferred'] = len(deferred)
+        summary['resumes_at'] = deferred[0]['resumes_at']
+        on_status(f"⏸️ {len(deferred)} playlists deferred until "
+                  f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(summary['resumes_at']))}")
+    added = sum(p.get('transferred', p.get('added', 0)) for p in summary['playlists'])
+    summary['tracks_per_second'] = round(added / summary['seconds'], 2) if summary['seconds'] else 0.0
+    checks = [p['verify'] for p in summary['playlists'] if 'calls' in p.get('verify', {})]
+    if checks:
+        # Reported on its own so transfer throughput isn't blurred by the read-back
+        summary['verification'] = {
+            'playlists': len(checks),
+            'readded': sum(check['readded'] for check in checks),
+            'calls': sum(check['calls'] for check in checks),
+            'seconds': round(sum(check['seconds'] for check in checks), 3)
+        }
+        on_status(f"🔍 Verification: {summary['verification']['readded']} tracks re-added across "
+                  f"{len(checks)} playlists, {summary['verification']['calls']} requests, "
+                  f"{summary['verification']['seconds']:.1f}s")
+    metrics.set("tracks_per_second", summary['tracks_per_second'])
+    summary['metrics'] = metrics.snapshot()
+    
+    breakdown = format_breakdown(summary['metrics'])
+    if breakdown:
+        on_status(f"⏱️ {added} tracks in {summary['seconds']:.1f}s ({summary['tracks_per_second']} tracks/s)")
+        for line in breakdown:
+            on_status(f"   {line}")
+    return summary
+
+def diff_tracks(previous_tracks, tracks):
+    """Compare stored [key, video_id] pairs with the current Spotify tracks.
+    
+    Returns (new_tracks, removed_video_ids). Repeated tracks are counted, so a
+    song added a second time is new. Stored tracks without a videoId count as
+    new again and get another search.
+    """
+    keys = [track_keys(track)[0] for track in tracks]
+    found = Counter(key for key, video_id in previous_tracks if video_id)
+    
+    new_tracks = []
+    seen = Counter()
+    for key, track in zip(keys, tracks):
+        seen[key] += 1
+        if seen[key] > found[key]:
+            new_tracks.append(track)
+    
+    current = Counter(keys)
+    removed = []
+    kept = Counter()
+    for key, video_id in previous_tracks:
+        if not video_id:
+            continue
+        kept[key] += 1
+        if kept[key] > current[key]:
+            removed.append(video_id)
+    return new_tracks, removed
+
+def appended_matches(youtube_client, tracks, resolved):
+    """Map track key to videoId for the given tracks that were matched during a sync's append"""
+    cache = youtube_client.cache
+    matches = {}
+    for track in tracks:
+        key = track_keys(track)[0]
+        # Tracks whose resolve failed were searched again while appending, and those matches went to the cache
+        video_id = resolved.get(key) if key in resolved else cache.get_isrc(track.get('isrc')) or cache.peek(track)
+        if video_id:
+            matches[key] = video_id
+    return matches
+
+def run_sync(spotify_client, youtube_client, playlists, state=None, remove_deleted=False,
+             on_status=print, on_progress=None, on_track=None, metrics=None, profile=None, verify=False):
+    """Mirror playlists incrementally and return a summary like run_transfer's.
+    
+    Playlists whose Spotify snapshot_id matches the last sync are skipped
+    without fetching their tracks. Changed ones are diffed against the stored
+    state: only new tracks are searched and appended to the existing YouTube
+    playlist, and with remove_deleted, tracks gone from Spotify are removed.
+    With a quota on the YouTube client, a playlist whose writes no longer fit
+    the budget is deferred before anything is written to it. When an append
+    or removal fails, the state keeps the old snapshot plus the chunks that
+    landed, so the next sync redoes only the rest. With verify, every synced
+    playlist is checked against the full stored state and anything missing
+    is re-added.
+    """
+    state = state or SyncState()
+    metrics = metrics or youtube_client.metrics
+    profiler = Profiler(profile)
+    quota = youtube_client.quota
+    started = time.time()
+    total_playlists = len(playlists)
+    summary = {'playlists': [], 'mode': 'sync'}
+    
+    for idx, playlist in enumerate(playlists):
+        name = playlist['name']
+        playlist_started = time.time()
+        if quota and quota.exhausted:
+            on_status(f"⏸️ Deferred '{name}' - request budget spent")
+            summary['playlists'].append(deferred_result(playlist, quota.resets_at))
+            continue
+        result = {'id': playlist['id'], 'name': name, 'added': 0, 'removed': 0,
+                  'not_found': 0, 'failed': 0, 'success': True}
+        summary['playlists'].append(result)
+        if on_progress:
+            on_progress(idx * 100 / total_playlists, f"Syncing playlist {idx + 1} of {total_playlists}")
+        
+        previous = state.load(playlist['id'])
+        if previous and previous['snapshot_id'] == playlist.get('snapshot_id'):
+            on_status(f"⏭️ '{name}' unchanged since last sync")
+            metrics.inc("playlists_total", result="unchanged")
+            result.update(status='unchanged', seconds=round(time.time() - playlist_started, 3))
+            continue
+        
+        on_status(f"\n🔄 Syncing: {name}")
+        with profiler.profile(name, on_status):
+            tracks = spotify_client.get_playlist_tracks(playlist['id'])
+            if previous:
+                new_tracks, removed_ids = diff_tracks(previous['tracks'], tracks)
+                youtube_playlist_id = previous['youtube_playlist_id']
+                on_status(f"📋 {len(new_tracks)} new, {len(removed_ids)} removed since last sync")
+            else:
+                new_tracks, removed_ids = tracks, []
+                youtube_playlist_id = None
+                on_status(f"📋 First sync - {len(tracks)} tracks")
+            
+            def progress_callback(current, total, status):
+                if on_progress:
+                    on_progress(((idx * 100) + (current / total * 100)) / total_playlists, None)
+                if status.startswith("Failed"):
+                    result['failed'] += 1
+                    metrics.inc("tracks_total", result="failed")
+                    line = f"❌ {status}"
+                elif status.startswith("Not found"):
+                    result['not_found'] += 1
+                    metrics.inc("tracks_total", result="not_found")
+                    line = f"⚠️ {status}"
+                else:
+                    metrics.inc("tracks_total", result="matched")
+                    line = f"✓ {status}"
+                if on_track:
+                    on_track(line)
+            
+            try:
+                resolved, _ = call_with_breaker_pauses(
+                    youtube_client, on_status, youtube_client.resolve_tracks, new_tracks, progress_callback
+                ) if new_tracks else ({}, {})
+            except QuotaExceeded as e:
+                # Nothing written yet, and finished searches are cached for the next window
+                on_status(f"⏸️ Deferred '{name}' - {e}")
+                summary['playlists'][-1] = deferred_result(playlist, e.resets_at)
+                continue
+            except CircuitOpenError as e:
+                # Still failing after every pause, but nothing is written yet
+                metrics.inc("playlists_total", result="failed")
+                on_status(f"❌ Failed to sync '{name}': {e}\n")
+                result.update(status='failed', success=False, error=str(e),
+                              seconds=round(time.time() - playlist_started, 3))
+                continue
+            
+            if quota:
+                # Appends aren't journaled, so don't start writes the budget can't finish
+                matched = sum(1 for video_id in resolved.values() if video_id)
+                writes = math.ceil(matched / youtube_client.insert_chunk_size) + (0 if youtube_playlist_id else 1)
+                if remove_deleted and removed_ids:
+                    writes += 1 + math.ceil(len(removed_ids) / youtube_client.insert_chunk_size)
+                if quota.remaining() < writes:
+                    on_status(f"⏸️ Deferred '{name}' - its {writes} writes don't fit the remaining request budget")
+                    summary['playlists'][-1] = deferred_result(playlist, quota.resets_at)
+                    continue
+            
+            if new_tracks or not youtube_playlist_id:
+                transfer = youtube_client.create_playlist_and_add_tracks(
+                    name, new_tracks, transfer_id=None if previous else playlist['id'],
+                    resolved=resolved, playlist_id=youtube_playlist_id
+                )
+                result['added'] = transfer.added
+                if transfer.error:
+                    if previous and transfer.committed:
+                        # Keep the old snapshot but record the chunks that landed, so a rerun appends only the rest
+                        landed = appended_matches(youtube_client, new_tracks[:transfer.committed], resolved)
+                        state.save(playlist['id'], previous['snapshot_id'], youtube_playlist_id,
+                                   previous['tracks'] + [[key, video_id] for key, video_id in landed.items()])
+                    if quota and quota.exhausted:
+                        on_status(f"⏸️ Paused '{name}' - request budget spent; the next sync appends the rest\n")
+                        summary['playlists'][-1] = deferred_result(playlist, quota.resets_at)
+                        continue
+                    metrics.inc("playlists_total", result="failed")
+                    on_status(f"❌ Failed to sync '{name}': {transfer.error}\n")
+                    result.update(status='failed', success=False, error=transfer.error,
+                                  seconds=round(time.time() - playlist_started, 3))
+                    continue
+                youtube_playlist_id = transfer.playlist_id
+            
+            appended = appended_matches(youtube_client, new_tracks, resolved)
+            if remove_deleted and removed_ids:
+                try:
+                    result['removed'] = youtube_client.remove_tracks(youtube_playlist_id, removed_ids)
+                except Exception as e:
+                    # The appends landed; the old snapshot and tracks make the next sync retry the removal
+                    state.save(playlist['id'], previous['snapshot_id'], youtube_playlist_id,
+                               previous['tracks'] + [[key, video_id] for key, video_id in appended.items()])
+                    metrics.inc("playlists_total", result="failed")
+                    on_status(f"❌ Failed to remove deleted tracks from '{name}': {e}\n")
+                    result.update(status='failed', success=False, error=str(e),
+                                  seconds=round(time.time() - playlist_started, 3))
+                    continue
+        
+        # Failed searches stay out of the state so the next sync tries them again
+        known = {key: video_id for key, video_id in (previous['tracks'] if previous else []) if video_id}
+        known.update(appended)
+        synced = [[key, known[key]] for key in (track_keys(track)[0] for track in tracks) if key in known]
+        state.save(playlist['id'], playlist.get('snapshot_id'), youtube_playlist_id, synced)
+        
+        if verify and youtube_playlist_id:
+            result['verify'] = verify_result(youtube_client, youtube_playlist_id,
+                                             [video_id for _, video_id in synced if video_id], name, on_status)
+        
+        on_status(f"✅ Synced '{name}': {result['added']} added, {result['removed']} removed\n")
+        metrics.inc("playlists_total", result="success")
+        metrics.observe("playlist_transfer_seconds", time.time() - playlist_started)
+        result.update(status='updated' if previous else 'created',
+                      seconds=round(time.time() - playlist_started, 3))
+    
+    return finish_summary(summary, started, metrics, on_status)
@@ -0,0 +1,85 @@
+import json
+import os
+from paths import get_app_data_path, safe_filename
+
+class TransferJournal:
+    """Append-only journal that lets an interrupted playlist transfer resume.
+    
+    Matches are written before they are inserted, and a commit record is
+    written after each chunk lands in the YouTube playlist. Positions up to
+    the last commit are skipped on resume; positions matched after it are
+    inserted again from the journal without re-searching.
+    """
+    
+    def __init__(self, transfer_id, path=None):
+        self.path = path or get_app_data_path("journals", f"{safe_filename(transfer_id)}.jsonl")
+        self.playlist_id = None
+        self.committed = 0
+        self.added = 0
+        self.matches = {}
+        unterminated = self._load()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if unterminated:
+            self._file.write("\n")
+    
+    def _load(self):
+        """Replay the journal; returns True if its last record lacks a newline"""
+        if not os.path.exists(self.path):
+            return False
+        valid = 0
+        unterminated = False
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final write from a crash; everything before it is intact
+                    break
+                valid += len(line)
+                unterminated = not line.endswith(b"\n")
+                kind = record.get('type')
+                if kind == 'playlist':
+                    self.playlist_id = record['playlist_id']
+                elif kind == 'match':
+                    self.matches[record['index']] = record['video_id']
+                elif kind == 'commit':
+                    self.committed = record['upto']
+                    self.added = record['added']
+                    self.matches = {i: v for i, v in self.matches.items() if i > self.committed}
+        # Cut the torn line off, or records appended later would land on it and be lost with it
+        if valid < os.path.getsize(self.path):
+            os.truncate(self.path, valid)
+        return unterminated
+    
+    @property
+    def resumed(self):
+        return self.playlist_id is not None
+    
+    def _append(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+    
+    def record_playlist(self, playlist_id):
+        self.playlist_id = playlist_id
+        self._append({'type': 'playlist', 'playlist_id': playlist_id})
+    
+    def record_match(self, index, video_id):
+        self.matches[index] = video_id
+        self._append({'type': 'match', 'index': index, 'video_id': video_id})
+    
+    def record_commit(self, upto, added):
+        self.committed = upto
+        self.added = added
+        self.matches = {i: v for i, v in self.matches.items() if i > upto}
+        self._append({'type': 'commit', 'upto': upto, 'added': added})
+    
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+    
+    def complete(self):
+        """Discard the journal once the transfer has finished"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,232 @@
+"""Job-queue mode: spread searches over several YouTube Music accounts.
+
+A single account's rate limit caps how fast one transfer can search. Here
+playlists are queued once, any number of worker processes (each with its
+own oauth file, so its own rate limit) claim and search tracks, and the
+owner account inserts finished playlists:
+
+    python src/worker.py enqueue --all
+    python src/worker.py work --oauth-file search1.json --oauth-file search2.json
+    python src/worker.py insert --oauth-file oauth.json --wait
+    python src/worker.py status
+
+Workers can also run on their own, e.g. one per terminal, as long as they
+point at the same --queue file on a local disk.
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from job_queue import DEFAULT_LEASE_SECONDS, JobQueue
+from retry import CircuitOpenError
+from transfer import select_playlists
+
+def run_worker(queue, youtube_client, worker_id, batch_size=None, lease_seconds=DEFAULT_LEASE_SECONDS,
+               wait=False, poll_interval=5.0, on_status=print):
+    """Claim and search jobs until the queue is drained; returns (searched, failed).
+    
+    Each claimed batch is searched on the client's worker pool under its own
+    rate limiter. With wait, keep polling for new jobs instead of exiting.
+    """
+    batch_size = batch_size or youtube_client.max_in_flight
+    searched = 0
+    failed = 0
+    with ThreadPoolExecutor(max_workers=youtube_client.max_workers) as executor:
+        try:
+            while True:
+                jobs = queue.claim(worker_id, batch_size, lease_seconds)
+                if not jobs:
+                    counts = queue.counts()
+                    # Other workers' leases may still expire and need picking up
+                    if not wait and counts['pending'] == 0 and counts['leased'] == 0:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+                
+                results = []
+                try:
+                    for job_id, track, video_id, source in youtube_client.iter_matches(jobs, executor):
+                        if source == 'error':
+                            queue.fail(worker_id, job_id, f"Search failed: {track['title']} - {track['artist']}")
+                            failed += 1
+                        else:
+                            results.append((job_id, video_id))
+                except CircuitOpenError as e:
+                    # Hand the batch back for other accounts while this one cools down
+                    queue.complete(worker_id, results)
+                    queue.release(worker_id)
+                    on_status(f"[{worker_id}] {e}")
+                    time.sleep(youtube_client.retry.breaker.reset_timeout)
+                    continue
+                
+                queue.complete(worker_id, results)
+                searched += len(results)
+                on_status(f"[{worker_id}] {searched} searched, {failed} failed")
+        finally:
+            queue.release(worker_id)
+    return searched, failed
+
+def run_inserter(queue, youtube_client, wait=False, poll_interval=5.0, on_status=print):
+    """Create and fill the YouTube playlist of every fully searched playlist.
+    
+    Inserts are journaled like a normal transfer, so a crashed inserter
+    resumes where it stopped. Returns (inserted, failed) playlist counts;
+    a playlist that fails is tried again on the next pass with wait.
+    """
+    inserted = 0
+    failed = set()
+    while True:
+        waiting = 0
+        for playlist in queue.playlists():
+            if playlist['inserted']:
+                continue
+            if not queue.is_ready(playlist['id']):
+                waiting += 1
+                continue
+            
+            tracks, resolved = queue.results(playlist['id'])
+            on_status(f"\n🎵 Inserting: {playlist['name']} ({len(tracks)} tracks)")
+            transfer = youtube_client.create_playlist_and_add_tracks(
+                playlist['name'], tracks, transfer_id=f"queue-{playlist['id']}", resolved=resolved
+            )
+            if transfer.error:
+                on_status(f"❌ Failed to insert '{playlist['name']}': {transfer.error}")
+                failed.add(playlist['id'])
+                continue
+            queue.mark_inserted(playlist['id'], transfer.playlist_id)
+            failed.discard(playlist['id'])
+            inserted += 1
+            on_status(f"✅ Inserted '{playlist['name']}' ({transfer.added}/{len(tracks)} tracks)")
+        
+        if not waiting or not wait:
+            return inserted, len(failed)
+        time.sleep(poll_interval)
+
+def make_youtube_client(oauth_file, args):
+    from cli import require_env
+    from youtube_client import YouTubeClient
+    
+    return YouTubeClient(
+        require_env("YOUTUBE_CLIENT_ID"), require_env("YOUTUBE_CLIENT_SECRET"),
+        max_workers=args.workers, requests_per_second=args.rate, oauth_file=oauth_file
+    )
+
+def work_process(oauth_file, args):
+    """Entry point of one worker process"""
+    load_dotenv(args.env_file)
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-{os.path.splitext(os.path.basename(oauth_file))[0]}"
+    youtube_client = make_youtube_client(oauth_file, args)
+    youtube_client.authenticate()
+    queue = JobQueue(args.queue)
+    try:
+        searched, failed = run_worker(queue, youtube_client, worker_id, args.batch, args.lease, args.wait,
+                                      on_status=lambda message: print(message, file=sys.stderr, flush=True))
+    finally:
+        queue.close()
+    print(f"[{worker_id}] finished: {searched} searched, {failed} failed", file=sys.stderr)
+
+def print_status(queue):
+    for playlist in queue.playlists():
+        counts = queue.counts(playlist['id'])
+        state = "inserted" if playlist['inserted'] else ("ready" if queue.is_ready(playlist['id']) else "searching")
+        print(f"{playlist['id']}\t{state}\t{counts['done']} done, {counts['pending']} pending, "
+              f"{counts['leased']} leased, {counts['failed']} failed\t{playlist['name']}")
+    totals = queue.counts()
+    print(f"total\t{totals['done']} done, {totals['pending']} pending, "
+          f"{totals['leased']} leased, {totals['failed']} failed")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="spotify-to-ytmusic-worker",
+        description="Search across several YouTube Music accounts through a shared job queue."
+    )
+    parser.add_argument("--queue", metavar="PATH", help="job queue database (default: app data job_queue.db)")
+    parser.add_argument("--env-file", default=".env", help="dotenv file to read credentials from")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    enqueue = commands.add_parser("enqueue", help="queue Spotify playlists for searching")
+    enqueue.add_argument("-p", "--playlist", action="append", default=[], metavar="NAME_OR_ID",
+                         help="playlist name or Spotify ID to queue (repeatable)")
+    enqueue.add_argument("-m", "--match", metavar="REGEX", help="queue every playlist whose name matches")
+    enqueue.add_argument("--all", action="store_true", help="queue every playlist")
+    
+    work = commands.add_parser("work", help="search queued tracks")
+    work.add_argument("--oauth-file", action="append", default=[],
+                      help="YouTube Music oauth file; one worker process per file (repeatable)")
+    work.add_argument("--workers", type=int, default=4, help="concurrent searches per process")
+    work.add_argument("--rate", type=float, default=3.0, help="requests per second per account")
+    work.add_argument("--batch", type=int, help="jobs claimed at a time (default: 4 x workers)")
+    work.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS,
+                      help="seconds before an unfinished claim is handed to another worker")
+    work.add_argument("--wait", action="store_true", help="keep polling for new jobs instead of exiting")
+    
+    insert = commands.add_parser("insert", help="create playlists from finished searches (owner account)")
+    insert.add_argument("--oauth-file", default="oauth.json", help="oauth file of the account that owns the playlists")
+    insert.add_argument("--workers", type=int, default=4, help="concurrent searches for failed jobs")
+    insert.add_argument("--rate", type=float, default=3.0, help="requests per second")
+    insert.add_argument("--wait", action="store_true", help="keep going until every queued playlist is inserted")
+    
+    commands.add_parser("status", help="show queue progress")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    load_dotenv(args.env_file)
+    
+    if args.command == "enqueue":
+        from cli import require_env
+        from spotify_client import SpotifyClient
+        
+        spotify_client = SpotifyClient(require_env("SPOTIFY_CLIENT_ID"), require_env("SPOTIFY_CLIENT_SECRET"))
+        spotify_client.authenticate()
+        playlists = spotify_client.get_playlists()
+        selected = playlists if args.all else select_playlists(playlists, args.playlist, args.match)
+        if not selected:
+            print("No playlists selected - use --playlist, --match or --all", file=sys.stderr)
+            return 2
+        queue = JobQueue(args.queue)
+        for playlist in selected:
+            added = queue.enqueue_playlist(playlist['id'], playlist['name'],
+                                           spotify_client.get_playlist_tracks(playlist['id']))
+            print(f"Queued {added} tracks from '{playlist['name']}'", file=sys.stderr)
+        queue.close()
+        return 0
+    
+    if args.command == "work":
+        oauth_files = args.oauth_file or ["oauth.json"]
+        missing = [path for path in oauth_files if not os.path.exists(path)]
+        if len(oauth_files) > 1 and missing:
+            # Interactive sign-in can't run in several processes at once
+            print(f"Missing oauth files: {', '.join(missing)} - sign in with each account first",
+                  file=sys.stderr)
+            return 2
+        if len(oauth_files) == 1:
+            work_process(oauth_files[0], args)
+            return 0
+        processes = [multiprocessing.Process(target=work_process, args=(path, args)) for path in oauth_files]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        return 0 if all(process.exitcode == 0 for process in processes) else 1
+    
+    queue = JobQueue(args.queue)
+    try:
+        if args.command == "insert":
+            youtube_client = make_youtube_client(args.oauth_file, args)
+            youtube_client.authenticate()
+            _, failed = run_inserter(queue, youtube_client, wait=args.wait,
+                                     on_status=lambda message: print(message, file=sys.stderr, flush=True))
+            counts = queue.counts()
+            return 0 if not failed and counts['pending'] == 0 and counts['leased'] == 0 else 1
+        print_status(queue)
+        return 0
+    finally:
+        queue.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
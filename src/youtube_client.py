@@ -1,26 +1,89 @@
 import time
 import os
 import sys
-import subprocess
 import json
-import webbrowser
 import threading
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
 from urllib.parse import urlparse, parse_qs
-from ytmusicapi import YTMusic
+from match_cache import MatchCache, track_keys
+from matching import CANDIDATE_LIMIT, best_match, query_ladder
+from metrics import REGISTRY
+from quota import QuotaExceeded
+from rate_limiter import TokenBucket
+from retry import AdaptiveController, CircuitOpenError, RetryPolicy
+from transfer_journal import TransferJournal
+
+class TransferResult:
+    """Outcome of create_playlist_and_add_tracks"""
+    
+    def __init__(self, playlist_id=None, added=0, keep_video_ids=False):
+        self.playlist_id = playlist_id
+        self.added = added
+        # Tracks up to this position are in the playlist (or had no match)
+        self.committed = 0
+        self.hits = 0
+        self.isrc = 0
+        self.misses = 0
+        self.shared = 0
+        # Only kept for verify_playlist, so big transfers don't hold every ID
+        self.video_ids = [] if keep_video_ids else None
+        self.error = None
+    
+    def record_insert(self, video_ids):
+        self.added += len(video_ids)
+        if self.video_ids is not None:
+            self.video_ids.extend(video_ids)
+    
+    @property
+    def success(self):
+        return self.error is None and self.added > 0
 
 class YouTubeClient:
-    def __init__(self, client_id, client_secret):
+    def __init__(self, client_id, client_secret, cache=None, max_workers=4, requests_per_second=3.0,
+                 oauth_file="oauth.json", max_requests_per_second=None, metrics=None, session=None, quota=None):
         self.client_id = client_id
         self.client_secret = client_secret
         self.ytmusic = None
-        self.oauth_file = "oauth.json"
+        self.oauth_file = oauth_file
+        self.session = session
+        self.cache = cache if cache is not None else MatchCache()
+        self.max_workers = max_workers
+        self.max_in_flight = max_workers * 4
+        self.insert_chunk_size = 100
+        self.rate_limiter = TokenBucket(requests_per_second)
+        # Start at requests_per_second and let AIMD probe up to the ceiling. Concurrency
+        # is capped at the pool size: 429s shrink it and successes grow it back to max_workers
+        self.controller = AdaptiveController(
+            self.rate_limiter, max_workers,
+            max_rate=max_requests_per_second or requests_per_second * 3
+        )
+        self.metrics = metrics or REGISTRY
+        # Optional QuotaBudget; every attempt, retries included, spends from it
+        self.retry = RetryPolicy(self.controller, metrics=self.metrics, service="youtube", budget=quota)
+    
+    @property
+    def quota(self):
+        return self.retry.budget
+    
+    @quota.setter
+    def quota(self, quota):
+        self.retry.budget = quota
     
     def authenticate(self):
+        # ytmusicapi is slow to import, so load it only when connecting
+        from ytmusicapi import YTMusic
+        from http_session import create_youtube_session
+        
+        # Pool one connection per request the controller lets run at once
+        if self.session is None:
+            self.session = create_youtube_session(pool_size=self.controller.max_concurrency)
+        
         # Check if oauth.json exists and is valid
         if os.path.exists(self.oauth_file):
             try:
-                self.ytmusic = YTMusic(self.oauth_file)
+                self.ytmusic = YTMusic(self.oauth_file, requests_session=self.session)
                 return
             except Exception as e:
                 print(f"Existing oauth.json is invalid: {e}")
@@ -52,12 +115,14 @@ class YouTubeClient:
         
         # Initialize YTMusic with the created oauth.json
         if os.path.exists(self.oauth_file):
-            self.ytmusic = YTMusic(self.oauth_file)
+            from ytmusicapi import YTMusic
+            self.ytmusic = YTMusic(self.oauth_file, requests_session=self.session)
         else:
             raise Exception("Failed to create oauth.json")
     
     def _install_ytmusicapi(self):
         """Install ytmusicapi if not present"""
+        import subprocess
         print("Installing ytmusicapi...")
         try:
             subprocess.check_call([sys.executable, "-m", "pip", "install", "ytmusicapi"])
@@ -66,6 +131,9 @@ class YouTubeClient:
     
     def _run_oauth_process(self):
         """Run the ytmusicapi oauth process"""
+        import webbrowser
+        from http.server import HTTPServer, BaseHTTPRequestHandler
+        
         print("Starting YouTube Music authentication...")
         
         # Set environment variables for ytmusicapi
@@ -142,8 +210,6 @@ class YouTubeClient:
     
     def _create_oauth_json(self, auth_code):
         """Create oauth.json file from authorization code"""
-        import requests
-        
         # Exchange authorization code for tokens
         token_url = "https://oauth2.googleapis.com/token"
         
@@ -155,7 +221,7 @@ class YouTubeClient:
             'grant_type': 'authorization_code'
         }
         
-        response = requests.post(token_url, data=data)
+        response = self.session.post(token_url, data=data)
         
         if response.status_code == 200:
             tokens = response.json()
@@ -176,47 +242,261 @@ class YouTubeClient:
         else:
             raise Exception(f"Failed to exchange code for tokens: {response.text}")
     
-    def search_track(self, track_info):
+    def search_track(self, track_info, use_cache=True):
+        """Return the videoId of the best scoring search result, or None.
+        
+        Each query of the ladder fetches a few candidates and scores them
+        locally (see matching.py); simpler queries are only tried when nothing
+        scores high enough. A track no query matches is remembered as a miss.
+        """
         if not self.ytmusic:
             raise Exception("Not authenticated")
         
-        query = f"{track_info['title']} {track_info['artist']}"
+        if use_cache:
+            cached = self.cache.get_isrc(track_info.get('isrc')) or self.cache.get(track_info)
+            if cached or self.cache.is_known_miss(track_info):
+                return cached
+        
+        # Errors that survive the retries propagate, so a failed search is
+        # never mistaken for "not found"
+        for query in query_ladder(track_info):
+            search_results = self._call(self.ytmusic.search, query, filter="songs", limit=CANDIDATE_LIMIT)
+            candidate, score = best_match(track_info, search_results[:CANDIDATE_LIMIT])
+            if candidate:
+                self.cache.put(track_info, candidate['videoId'])
+                return candidate['videoId']
+        self.cache.put_miss(track_info)
+        return None
+    
+    def _call(self, fn, *args, **kwargs):
+        """Call the YTMusic API under the rate limiter, retry policy, circuit breaker and quota"""
+        return self.retry.call(fn, *args, **kwargs)
+    
+    def _match_track(self, track_info):
+        """Return (video_id, source) where source is 'isrc', 'cache', 'search' or 'error'"""
+        # An ISRC names the exact recording, so an indexed one needs no search
+        indexed = self.cache.get_isrc(track_info.get('isrc'))
+        if indexed:
+            self.metrics.inc("match_cache_lookups_total", result="isrc")
+            return indexed, 'isrc'
+        cached = self.cache.get(track_info)
+        if cached:
+            self.metrics.inc("match_cache_lookups_total", result="hit")
+            return cached, 'cache'
+        if self.cache.is_known_miss(track_info):
+            self.metrics.inc("match_cache_lookups_total", result="known_miss")
+            return None, 'cache'
+        self.metrics.inc("match_cache_lookups_total", result="miss")
         try:
-            search_results = self.ytmusic.search(query, filter="songs", limit=1)
-            return search_results[0]['videoId'] if search_results else None
+            return self.search_track(track_info, use_cache=False), 'search'
+        except (CircuitOpenError, QuotaExceeded):
+            raise
         except Exception as e:
-            print(f"Error searching for {query}: {str(e)}")
-            return None
+            print(f"Error searching for {track_info['title']} {track_info['artist']}: {str(e)}")
+            return None, 'error'
+    
+    def iter_matches(self, tracks, executor, known=None, resolved=None):
+        """Yield (position, track, video_id, source) in input order with a bounded window of pending searches.
+        
+        tracks is an iterable of (position, track) pairs; position can be any
+        hashable ID, such as a job ID. Searches run on the given executor, at
+        most max_in_flight ahead of the consumer. Positions already present in
+        known, and tracks already present in the resolved map (keyed by track
+        key), are answered without searching. source is 'isrc', 'cache',
+        'search', 'error', 'journal' or 'resolved'; CircuitOpenError and
+        QuotaExceeded propagate to the caller.
+        """
+        known = known or {}
+        resolved = resolved or {}
+        pending = deque()
+        for position, track in tracks:
+            key = track_keys(track)[0]
+            if position in known or key in resolved:
+                future = Future()
+                if position in known:
+                    future.set_result((known[position], 'journal'))
+                else:
+                    future.set_result((resolved[key], 'resolved'))
+            else:
+                future = executor.submit(self._match_track, track)
+            pending.append((position, track, future))
+            if len(pending) >= self.max_in_flight:
+                position, track, future = pending.popleft()
+                yield (position, track) + future.result()
+        while pending:
+            position, track, future = pending.popleft()
+            yield (position, track) + future.result()
     
-    def create_playlist_and_add_tracks(self, playlist_name, tracks, progress_callback=None):
+    def resolve_tracks(self, tracks, progress_callback=None):
+        """Search each track once; returns maps of track key to videoId (or None) and to its source"""
         if not self.ytmusic:
             raise Exception("Not authenticated")
         
-        try:
-            playlist_id = self.ytmusic.create_playlist(
-                playlist_name, 
-                "Imported from Spotify"
-            )
-            video_ids = []
-            
-            for idx, track in enumerate(tracks, 1):
-                video_id = self.search_track(track)
-                if video_id:
-                    video_ids.append(video_id)
-                    status = f"Added {track['title']} ({idx}/{len(tracks)})"
+        resolved = {}
+        sources = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for idx, track, video_id, source in self.iter_matches(enumerate(tracks, 1), executor):
+                sources[track_keys(track)[0]] = source
+                if source == 'error':
+                    # Left out of the map so the playlist pass searches it again
+                    status = f"Failed: {track['title']} - {track['artist']}"
                 else:
-                    status = f"Not found: {track['title']} - {track['artist']}"
-                
+                    resolved[track_keys(track)[0]] = video_id
+                    if video_id:
+                        status = f"Matched {track['title']} ({idx}/{len(tracks)})"
+                    else:
+                        status = f"Not found: {track['title']} - {track['artist']}"
                 if progress_callback:
                     progress_callback(idx, len(tracks), status)
-                
-                time.sleep(1.2)
+        return resolved, sources
+    
+    def _add_items(self, playlist_id, video_ids, duplicates=False):
+        """Insert videoIds into a playlist, raising unless the service reports success"""
+        response = self._call(self.ytmusic.add_playlist_items, playlist_id, video_ids, duplicates=duplicates)
+        status = response.get('status') if isinstance(response, dict) else None
+        if not status or "SUCCEEDED" not in status:
+            raise Exception(f"Adding {len(video_ids)} tracks to {playlist_id} failed: {response}")
+    
+    def remove_tracks(self, playlist_id, video_ids):
+        """Remove one playlist entry per videoId given; returns how many were removed"""
+        if not self.ytmusic:
+            raise Exception("Not authenticated")
+        
+        # Removal needs each entry's setVideoId, so read the playlist once
+        remaining = Counter(video_ids)
+        playlist = self._call(self.ytmusic.get_playlist, playlist_id, limit=None)
+        entries = []
+        for item in playlist.get('tracks', []):
+            if remaining[item.get('videoId')] > 0:
+                remaining[item['videoId']] -= 1
+                entries.append({'videoId': item['videoId'], 'setVideoId': item['setVideoId']})
+        
+        for start in range(0, len(entries), self.insert_chunk_size):
+            self._call(self.ytmusic.remove_playlist_items, playlist_id,
+                       entries[start:start + self.insert_chunk_size])
+        return len(entries)
+    
+    def verify_playlist(self, playlist_id, video_ids):
+        """Read a playlist back and re-add the given videoIds it is missing.
+        
+        video_ids is what should be in the playlist, repeats included; entries
+        beyond it (added by hand, say) are left alone. Missing items are
+        appended in insert_chunk_size chunks, so they land at the end.
+        Returns counts plus the requests and seconds verification took.
+        """
+        if not self.ytmusic:
+            raise Exception("Not authenticated")
+        
+        started = time.time()
+        playlist = self._call(self.ytmusic.get_playlist, playlist_id, limit=None)
+        present = Counter(item.get('videoId') for item in playlist.get('tracks', []))
+        missing = list((Counter(video_ids) - present).elements())
+        
+        calls = 1
+        for start in range(0, len(missing), self.insert_chunk_size):
+            # Some of these may be legitimate repeats the first insert deduplicated
+            self._add_items(playlist_id, missing[start:start + self.insert_chunk_size], duplicates=True)
+            calls += 1
+        
+        seconds = time.time() - started
+        self.metrics.observe("playlist_verify_seconds", seconds)
+        self.metrics.inc("verify_readded_total", len(missing))
+        return {
+            'expected': len(video_ids),
+            'found': sum(min(count, present[video_id]) for video_id, count in Counter(video_ids).items()),
+            'readded': len(missing),
+            'calls': calls,
+            'seconds': round(seconds, 3)
+        }
+    
+    def create_playlist_and_add_tracks(self, playlist_name, tracks, progress_callback=None, total=None,
+                                       transfer_id=None, resolved=None, playlist_id=None, keep_video_ids=False):
+        """Fill a new (or the given) playlist from a list or stream of tracks, journaled under transfer_id"""
+        if not self.ytmusic:
+            raise Exception("Not authenticated")
+        
+        if total is None and hasattr(tracks, '__len__'):
+            total = len(tracks)
+        
+        journal = TransferJournal(transfer_id) if transfer_id else None
+        result = TransferResult(keep_video_ids=keep_video_ids)
+        try:
+            if journal and journal.resumed:
+                playlist_id = journal.playlist_id
+                print(f"Resuming {playlist_name} after track {journal.committed}")
+            else:
+                if not playlist_id:
+                    playlist_id = self._call(
+                        self.ytmusic.create_playlist,
+                        playlist_name, 
+                        "Imported from Spotify"
+                    )
+                if journal:
+                    journal.record_playlist(playlist_id)
+            result.playlist_id = playlist_id
+            
+            committed = journal.committed if journal else 0
+            result.committed = committed
+            result.added = journal.added if journal else 0
+            known = journal.matches if journal else None
+            chunk = []
+            last = committed
+            
+            # Tracks before the last committed chunk are already in the playlist
+            positions = enumerate(islice(tracks, committed, None), committed + 1)
             
-            if video_ids:
-                self.ytmusic.add_playlist_items(playlist_id, video_ids)
-                return True, len(video_ids)
-            return False, 0
+            # Searches run on a worker pool throttled by the shared rate limiter,
+            # and results come back in playlist order
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for idx, track, video_id, source in self.iter_matches(positions, executor, known, resolved):
+                    if source == 'isrc':
+                        result.hits += 1
+                        result.isrc += 1
+                    elif source == 'cache':
+                        result.hits += 1
+                    elif source == 'search':
+                        result.misses += 1
+                    elif source == 'resolved':
+                        result.shared += 1
+                    last = idx
+                    expected = max(total or 0, idx)
+                    if journal and idx not in journal.matches and source != 'error':
+                        journal.record_match(idx, video_id)
+                    
+                    if video_id:
+                        chunk.append(video_id)
+                        status = f"Added {track['title']} ({idx}/{expected})"
+                    elif source == 'error':
+                        status = f"Failed: {track['title']} - {track['artist']}"
+                    else:
+                        status = f"Not found: {track['title']} - {track['artist']}"
+                    
+                    if len(chunk) >= self.insert_chunk_size:
+                        # Only a chunk the service confirmed is committed; a failed one is retried on resume
+                        self._add_items(playlist_id, chunk)
+                        result.record_insert(chunk)
+                        result.committed = idx
+                        chunk = []
+                        if journal:
+                            journal.record_commit(idx, result.added)
+                    
+                    if progress_callback:
+                        progress_callback(idx, expected, status)
+            
+            if chunk:
+                self._add_items(playlist_id, chunk)
+                result.record_insert(chunk)
+            result.committed = last
+            if journal:
+                journal.complete()
+            return result
         
         except Exception as e:
             print(f"Error transferring playlist {playlist_name}: {str(e)}")
-            return False, 0
\ No newline at end of file
+            # Chunks inserted before the error are still in the playlist and counted in added
+            result.error = str(e)
+            return result
+        
+        finally:
+            if journal:
+                journal.close()
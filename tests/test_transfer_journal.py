@@ -0,0 +1,57 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from transfer_journal import TransferJournal
+
+def crash(journal, torn):
+    """Stop writing mid-record, the way a killed process leaves the file"""
+    journal._file.write(torn)
+    journal.close()
+
+class TransferJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "journal.jsonl")
+    
+    def test_resumes_after_two_crashes(self):
+        journal = TransferJournal("playlist", self.path)
+        journal.record_playlist("PL1")
+        journal.record_match(1, "a")
+        journal.record_commit(100, 100)
+        crash(journal, '{"type": "commit", "up')
+        
+        journal = TransferJournal("playlist", self.path)
+        self.assertEqual((journal.playlist_id, journal.committed, journal.added), ("PL1", 100, 100))
+        journal.record_match(101, "b")
+        journal.record_commit(200, 200)
+        crash(journal, '{"type": "ma')
+        
+        journal = TransferJournal("playlist", self.path)
+        self.assertEqual((journal.playlist_id, journal.committed, journal.added), ("PL1", 200, 200))
+        journal.record_match(201, "c")
+        journal.close()
+        
+        journal = TransferJournal("playlist", self.path)
+        self.assertEqual(journal.committed, 200)
+        self.assertEqual(journal.matches, {201: "c"})
+        journal.close()
+    
+    def test_keeps_a_complete_record_missing_its_newline(self):
+        journal = TransferJournal("playlist", self.path)
+        journal.record_playlist("PL1")
+        crash(journal, '{"type": "commit", "upto": 100, "added": 100}')
+        
+        journal = TransferJournal("playlist", self.path)
+        self.assertEqual(journal.committed, 100)
+        journal.record_commit(200, 200)
+        journal.close()
+        
+        journal = TransferJournal("playlist", self.path)
+        self.assertEqual(journal.committed, 200)
+        journal.close()
+
+if __name__ == "__main__":
+    unittest.main()